@@ -15,6 +15,11 @@ import datetime
 import os
 import threading
 import time
+
+# Record when the program started, to report startup time (before any
+# slower imports)
+START_TIME = time.perf_counter()
+
 import tkinter as tk
 from tkinter import filedialog
 from tkinter import messagebox
@@ -22,16 +27,15 @@ import traceback
 
 from data.calibration import Calibration
 from hardware.helmholtz_cage import HelmholtzCage
-from interface.config_page import ConfigurationPage
 from interface.main_page import MainPage
 from interface.help_page import HelpPage
-from interface.calibration_page import CalibrationPage
-from utilities.template import retrieve_template, check_template_values
+from utilities.resample import resample_template
+from utilities.template import retrieve_template, validate_template
 from utilities.config import retrieve_configuration_info
 
 
 # Global constants
-UPDATE_PLOT_TIME = 1  # secs
+UPDATE_PLOT_TIME = 0.04  # secs
 
 
 class CageApp(tk.Tk):
@@ -52,6 +56,7 @@ class CageApp(tk.Tk):
         configs = retrieve_configuration_info(self.config_path)
         ps_config = configs["power_supplies"]
         mag_config = configs["magnetometer"]
+        run_config = configs.get("run", {})
         
         # Initialize frame
         tk.Tk.__init__(self, *args, **kwargs)
@@ -70,7 +75,8 @@ class CageApp(tk.Tk):
         container.grid_columnconfigure(0, weight=1)
         
         # Initialize Helmholtz Cage interface
-        self.cage = HelmholtzCage(self.main_path, ps_config, mag_config)
+        self.cage = HelmholtzCage(self.main_path, ps_config, mag_config,
+                                  run_config)
         
         # Set parameters
         self.log_data = False
@@ -87,7 +93,18 @@ class CageApp(tk.Tk):
         
         # Show the main page
         self.show_frame(MainPage)
+        
+        # Report startup time once the window (and its plots) are up
+        self.after_idle(self.report_startup_time)
     
+    def report_startup_time(self):
+        """
+        Print how long the program took to start up.
+        """
+        
+        print("Startup time: {:.2f} secs".format(
+            time.perf_counter() - START_TIME))
+
     def refresh_connections(self):
         """
         Refresh the connections to the connected instruments (activated 
@@ -139,19 +156,25 @@ class CageApp(tk.Tk):
         # Start tracking plots
         # TODO: Rework?
         if success:
-            self.frames[MainPage].power_supplies_plot.clear()
-            self.frames[MainPage].mag_field_plot.clear()
+            self.frames[MainPage].clear_plot_frame()
             self.cage.data.plot_titles = "None"
             
             # Record start time
             self.cage.data.start_time = datetime.datetime.now()
-                
+            
+            # Start streaming data to storage if requested
+            if self.log_data:
+                self.cage.start_logging()
+            
+            # Start sampling instruments in the background
+            self.cage.start_acquisition()
+            
             # Start updating plot with live data
             self.update_plots_at_runtime()
             
-            # Start control looping for dynamic tests
+            # Start running through template for dynamic tests
             if static_or_dynamic == "dynamic":
-                self.loop_dynamic_run()
+                self.cage.start_dynamic_run()
             
             # Update buttons
             self.frames[MainPage].start_cage_update_buttons()
@@ -165,39 +188,29 @@ class CageApp(tk.Tk):
         """
         Update the GUI plots at runtime for the cage, using the tk.after
         method.
+        
+        NOTE: Instruments are sampled by the cage's acquisition thread,
+              this only collects the samples taken since the last update.
         """
         
         # Only run function if cage is still running
         if self.cage.is_running:
             
+            # Stop cage once template has been completed
+            if self.cage.dynamic_run_finished():
+                self.stop_cage()
+                return
+            
             # Retrieve current data 
-            data_now = self.cage.update_data()
+            self.cage.store_samples()
             
             # Redraw plots with newest data
             self.frames[MainPage].fill_plot_frame()
             
             # Set next update loop
-            self.frames[MainPage].after(UPDATE_PLOT_TIME*1000,
+            self.frames[MainPage].after(int(UPDATE_PLOT_TIME*1000),
                                         self.update_plots_at_runtime)
     
-    def loop_dynamic_run(self):
-        """
-        Loop once through a dynamic run of the Cage, with the next cycle
-        time being determined from template file times.
-        
-        TODO: Test under real conditions (will threading be necessary?)
-        """
-        
-        # Loop through one cycle of dynamic run
-        if self.cage.is_running:
-            dt, finished = self.cage.run_once()
-            
-            # Check if finished, otherwise prepare next loop
-            if not finished:
-                self.frames[MainPage].after(int(dt*1000), self.loop_dynamic_run)
-            else:
-                self.stop_cage()
-    
     def command_static_value(self):
         """
         Based on the type of control send an appropriate static value
@@ -244,9 +257,9 @@ class CageApp(tk.Tk):
         if success:
             print("Session ended successfully")
             
-            # Log data if requested
+            # Finish logging data if requested
             if self.log_data:
-                self.cage.data.write_to_file()
+                self.cage.stop_logging()
             
             # Calibarate cage from data if specified
             if self.is_calibration_run:
@@ -275,7 +288,9 @@ class CageApp(tk.Tk):
         # If accepted, write to file
         if accepted:
             self.cage.calibration.write_to_file()
-            self.cage.has_calibration = True
+            if not self.cage.set_calibration(self.cage.calibration):
+                print("WARN: Loaded template is beyond limits with this "
+                      "calibration")
             print("Calibration accepted")
             
             # Put calibration file name into GUI entry
@@ -284,8 +299,7 @@ class CageApp(tk.Tk):
         
         # Otherwise, delete calibration
         else:
-            self.cage.calibration = None
-            self.cage.has_calibration = False
+            self.cage.set_calibration(None)
             print("Calibration rejected")
             
         # Clear data for next run
@@ -310,14 +324,17 @@ class CageApp(tk.Tk):
         # Retrieve and check the calibration
         if type(file_name) == str and file_name != "":
             calibration_name = os.path.basename(file_name)
-            calibration = Calibration(self.calibration_path, calibration_name)
+            mode = self.cage.run_config.get("calibration_mode", "diagonal")
+            calibration = Calibration(self.calibration_path, calibration_name,
+                                      mode)
             success = calibration.load_from_file()
         
             # Give calibration to the Helmholtz Cage
             if success:
                 print(calibration)
-                self.cage.calibration = calibration
-                self.cage.has_calibration = True
+                if not self.cage.set_calibration(calibration):
+                    print("WARN: Loaded template is beyond limits with "
+                          "this calibration")
                 self.cage.data.calibration_file = file_name
                 
                 # Put calibration file name into GUI entry
@@ -342,12 +359,35 @@ class CageApp(tk.Tk):
         if type(file_name) == str and file_name != "":
             template_name = os.path.basename(file_name)
             template = retrieve_template(self.template_path, template_name)
-            is_okay = check_template_values(template, [5.0, 1.5]) # <--TODO: replace these
             
-            # Give template to the Helmholtz Cage
+            # Check template as read from the file
+            report = validate_template(template, self.cage.template_limits)
+            print(report)
+            is_okay = report.is_okay
+            
+            # Resample template to a fixed control rate, if set (checking
+            # the resampled values, as interpolation may overshoot)
+            rate = self.cage.run_config.get("template_rate", 0.0)
+            if is_okay and rate > 0.0:
+                method = self.cage.run_config.get("template_interpolation",
+                                                  "linear")
+                try:
+                    template = resample_template(template, rate, method)
+                    report = validate_template(template,
+                                               self.cage.template_limits)
+                    if not report.is_okay:
+                        print("Resampled: {}".format(report))
+                    is_okay = report.is_okay
+                except ValueError as err:
+                    print("ERROR: Unable to resample template | {}".format(
+                        err))
+                    is_okay = False
+            
+            # Give template to the Helmholtz Cage (converting it to 
+            # voltages ahead of the run)
+            if is_okay:
+                is_okay = self.cage.set_template(template)
             if is_okay:
-                self.cage.template = template
-                self.cage.has_template = True
                 self.cage.data.template_file = file_name
             
                 # Put template file name into GUI entry
@@ -374,6 +414,8 @@ class CageApp(tk.Tk):
         TODO
         """
         
+        from interface.config_page import ConfigurationPage
+        
         self.config_page = ConfigurationPage(self)
     
     def show_calibration_page(self):
@@ -381,6 +423,10 @@ class CageApp(tk.Tk):
         Display calibration data within calibration page GUI.
         """
         
+        # NOTE: Imported here, as the calibration page's plots load
+        #       matplotlib
+        from interface.calibration_page import CalibrationPage
+        
         self.calibration_page = CalibrationPage(self, self.cage.calibration,
                                                 self.cage.data)
     
@@ -0,0 +1,454 @@
+#!/usr/bin/env python3
+
+"""
+  Microbenchmarks for the hot paths of the Helmholtz Cage software.
+  
+  Runs offline: magnetometer parsing reads from a pyserial loopback
+  port, the cage uses the fake instrument managers, and plots are drawn
+  on an off-screen canvas. Results are stored as JSON in 'benchmarks/'
+  and compared against a saved baseline, flagging any benchmark slower
+  than the baseline by more than the threshold.
+  
+  Usage: benchmark.py [--save-baseline] [--threshold FRACTION]
+                      [--repeat N] [--only NAME [NAME ...]]
+  
+  Copyright 2026 UC CubeCats
+  All rights reserved. See LICENSE file at:
+  https://github.com/uccubecats/Helmholtz-Cage/LICENSE
+  Additional copyright may be held by others, as reflected in the commit
+  history.
+"""
+
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+import numpy as np
+import serial
+from tabulate import tabulate
+
+from data.calibration import Calibration
+from data.data import Data
+from hardware.helmholtz_cage import HelmholtzCage
+from hardware.hp603xa import HP603xAInterface
+from hardware.mlx90393 import MLX90393Interface
+from interface.live_plot import LivePlot
+from utilities.template import (
+    DEFAULT_LIMITS, retrieve_template, check_template_values
+)
+
+
+# Global constants
+CUR_PATH = os.path.dirname(os.path.abspath(__file__))
+MAIN_PATH = os.path.abspath(os.path.join(CUR_PATH, os.pardir))
+BENCHMARK_PATH = os.path.join(MAIN_PATH, "benchmarks")
+BASELINE_FILE = "baseline.json"
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_REPEAT = 5
+FIELD_LINE = b"X: -23.458  Y: 105.734  Z: -41.002  E\r\n"
+PLOT_TIMESPAN = 30 # secs
+
+
+def time_calls(func, number):
+    """
+    Time a number of calls to a function, returning the mean time per
+    call (secs).
+    """
+    
+    start = time.perf_counter()
+    for i in range(0, number):
+        func()
+    
+    return (time.perf_counter() - start)/number
+
+def create_session_points(n_points, duration):
+    """
+    Create a set of session data points (ordered the same as the data
+    labels) spread over the given duration, as a cycling single-axis
+    calibration run would produce.
+    """
+    
+    points = np.zeros((n_points, 13))
+    points[:, 0] = np.linspace(0.0, duration, n_points)
+    
+    # Step each axis in turn through a set of voltages
+    axis = (np.arange(n_points)//100) % 3
+    voltage = ((np.arange(n_points)//10) % 10 + 1)*0.1
+    for i in range(0, 3):
+        on_axis = axis == i
+        points[on_axis, 1 + i] = voltage[on_axis]
+        points[on_axis, 4 + i] = voltage[on_axis]/2.5
+        points[on_axis, 10 + i] = voltage[on_axis]
+    
+    # Add measured fields, with some coupling and noise
+    gain = np.array([[1.2, 0.1, 0.0], [0.05, 1.1, 0.1], [0.0, 0.02, 0.9]])
+    noise = np.random.default_rng(0).normal(0.0, 0.01, (n_points, 3))
+    points[:, 7:10] = points[:, 1:4] @ gain + 0.25 + noise
+    
+    return points
+
+def create_data(work_dir, n_points, duration):
+    """
+    Create a session data set filled with points.
+    """
+    
+    data = Data(work_dir)
+    data.add_points(create_session_points(n_points, duration))
+    data.req_type = "voltage"
+    data.start_time = datetime.datetime.now()
+    
+    return data
+
+def bench_read_sensor(work_dir):
+    """
+    Parse one magnetometer line (sent through a loopback port).
+    """
+    
+    port = serial.serial_for_url("loop://", timeout=1.0)
+    interface = MLX90393Interface(port)
+    
+    def read_line():
+        port.write(FIELD_LINE)
+        interface.read_sensor()
+    
+    try:
+        return time_calls(read_line, 2000)
+    finally:
+        port.close()
+
+def bench_read_samples(work_dir):
+    """
+    Drain and parse 100 waiting magnetometer lines (sent through a
+    loopback port).
+    """
+    
+    port = serial.serial_for_url("loop://", timeout=1.0)
+    interface = MLX90393Interface(port)
+    
+    def read_lines():
+        port.write(FIELD_LINE*100)
+        interface.read_samples()
+    
+    try:
+        return time_calls(read_lines, 200)
+    finally:
+        port.close()
+
+def bench_format_query_resp(work_dir):
+    """
+    Format a power supply voltage query response.
+    """
+    
+    params = {"max_voltage": 0.0, "max_current": 0.0}
+    interface = HP603xAInterface("x", "", None, params)
+    
+    return time_calls(
+        lambda: interface.format_query_resp("VOUT 12.3456\r\n", "VOUT",
+                                            "float"), 20000)
+
+def bench_add_point(work_dir):
+    """
+    Add one data point to a session.
+    """
+    
+    data = Data(work_dir)
+    point = create_session_points(1, 0.0)[0].tolist()
+    
+    return time_calls(lambda: data.add_point(point), 20000)
+
+def bench_retrieve_data_subset(work_dir):
+    """
+    Retrieve one axis' points out of a 100k point session.
+    """
+    
+    data = create_data(work_dir, 100000, 3600.0)
+    mask = np.asarray(data.x_req) != 0.0
+    
+    return time_calls(lambda: data.retrieve_data_subset(mask), 20)
+
+def bench_write_data(work_dir):
+    """
+    Write a 20k point session to a csv file.
+    """
+    
+    data = create_data(work_dir, 20000, 600.0)
+    os.makedirs(data.session_dir, exist_ok=True)
+    
+    return time_calls(data.write_to_file, 3)
+
+def write_template(work_dir, n_rows):
+    """
+    Write a field template file with the given number of rows,
+    returning its name.
+    """
+    
+    file_name = "benchmark_template.csv"
+    t = np.arange(0, n_rows)*0.01
+    with open(os.path.join(work_dir, file_name), 'w') as template_file:
+        template_file.write("type,time,x_val,y_val,z_val\n")
+        for i in range(0, n_rows):
+            template_file.write("{},{:.2f},{:.4f},{:.4f},0.0\n".format(
+                "field" if i == 0 else "", t[i], np.sin(t[i]), np.cos(t[i])))
+    
+    return file_name
+
+def bench_retrieve_template(work_dir):
+    """
+    Parse a 100k row template file (without the cache).
+    """
+    
+    file_name = write_template(work_dir, 100000)
+    
+    return time_calls(lambda: retrieve_template(work_dir, file_name, False),
+                      3)
+
+def bench_retrieve_cached_template(work_dir):
+    """
+    Load a 100k row template file from its cache.
+    """
+    
+    file_name = write_template(work_dir, 100000)
+    retrieve_template(work_dir, file_name)
+    
+    return time_calls(lambda: retrieve_template(work_dir, file_name), 100)
+
+def bench_check_template_values(work_dir):
+    """
+    Check a 100k row template against the system limits.
+    """
+    
+    file_name = write_template(work_dir, 100000)
+    template = retrieve_template(work_dir, file_name)
+    
+    return time_calls(lambda: check_template_values(template, DEFAULT_LIMITS),
+                      20)
+
+def bench_calibration(work_dir):
+    """
+    Calibrate from a 30k point calibration run.
+    """
+    
+    data = create_data(work_dir, 30000, 600.0)
+    calibration = Calibration(work_dir, "benchmark_calibration.csv",
+                              "coupled")
+    
+    return time_calls(lambda: calibration.from_data(data), 20)
+
+def bench_update_plot(work_dir):
+    """
+    Update and draw the live plots for a new data point, over 30 secs
+    of 100 Hz data (as the main page does while running).
+    """
+    
+    # Set up plots on an off-screen canvas
+    fig = Figure()
+    power_axes, field_axes = fig.subplots(nrows=2, sharex=True)
+    live_plot = LivePlot(fig, power_axes, field_axes, PLOT_TIMESPAN)
+    live_plot.attach(FigureCanvasAgg(fig))
+    
+    # Fill plotted time span, keeping new points to add
+    points = create_session_points(4000, 40.0)
+    data = Data(work_dir)
+    data.add_points(points[:3000])
+    live_plot.draw(live_plot.update(data, "voltage"))
+    new_points = iter(points[3000:].tolist())
+    
+    def update_plot():
+        data.add_point(next(new_points))
+        live_plot.draw(live_plot.update(data, "voltage"))
+    
+    return time_calls(update_plot, 200)
+
+def time_startup(module):
+    """
+    Time starting a fresh Python process and importing a module from
+    the program (the startup cost before any window or run).
+    """
+    
+    command = [sys.executable, "-c", "import {}".format(module)]
+    
+    return time_calls(lambda: subprocess.run(command, cwd=CUR_PATH,
+                                             check=True), 3)
+
+def bench_app_startup(work_dir):
+    """
+    Start the GUI program up to creating its window.
+    """
+    
+    return time_startup("app")
+
+def bench_headless_startup(work_dir):
+    """
+    Start the headless runner up to parsing its arguments.
+    """
+    
+    return time_startup("headless")
+
+def bench_sample_instruments(work_dir):
+    """
+    Sample all instruments once, using the fake managers.
+    """
+    
+    ps_config = {"manager": "fake"}
+    mag_config = {"manager": "fake"}
+    run_config = {"latency_stats": False}
+    cage = HelmholtzCage(work_dir, ps_config, mag_config, run_config)
+    cage.connect_to_instruments()
+    cage.data.start_time = datetime.datetime.now()
+    
+    try:
+        return time_calls(cage.sample_instruments, 2000)
+    finally:
+        cage.shutdown()
+
+
+# Benchmarks to run, by name
+BENCHMARKS = {
+    "mlx90393.read_sensor": bench_read_sensor,
+    "mlx90393.read_samples": bench_read_samples,
+    "hp603xa.format_query_resp": bench_format_query_resp,
+    "data.add_point": bench_add_point,
+    "data.retrieve_data_subset": bench_retrieve_data_subset,
+    "data.write_to_file": bench_write_data,
+    "template.retrieve_template": bench_retrieve_template,
+    "template.retrieve_cached_template": bench_retrieve_cached_template,
+    "template.check_template_values": bench_check_template_values,
+    "calibration.from_data": bench_calibration,
+    "live_plot.update": bench_update_plot,
+    "cage.sample_instruments": bench_sample_instruments,
+    "startup.app": bench_app_startup,
+    "startup.headless": bench_headless_startup
+}
+
+
+def run_benchmarks(names, repeat):
+    """
+    Run each of the named benchmarks a number of times (each in a fresh
+    working directory), returning the best and median time per call.
+    """
+    
+    results = {}
+    for name in names:
+        times = []
+        for i in range(0, repeat):
+            with tempfile.TemporaryDirectory() as work_dir:
+                times.append(BENCHMARKS[name](work_dir))
+        results[name] = {"min": min(times),
+                         "median": statistics.median(times),
+                         "repeat": repeat}
+    
+    return results
+
+def load_results(file_name):
+    """
+    Load stored benchmark results, if they exist.
+    """
+    
+    file_path = os.path.join(BENCHMARK_PATH, file_name)
+    if not os.path.exists(file_path):
+        return None
+    
+    with open(file_path, 'r') as results_file:
+        return json.load(results_file)
+
+def save_results(file_name, results):
+    """
+    Store benchmark results (with the machine they were run on).
+    """
+    
+    content = {"time": datetime.datetime.now().isoformat(),
+               "python": platform.python_version(),
+               "machine": platform.node(),
+               "results": results}
+    
+    os.makedirs(BENCHMARK_PATH, exist_ok=True)
+    with open(os.path.join(BENCHMARK_PATH, file_name), 'w') as results_file:
+        json.dump(content, results_file, indent=2)
+
+def compare_results(results, baseline, threshold):
+    """
+    Compare the best time of each benchmark to the baseline, returning
+    a table of the results and the names of any regressions.
+    """
+    
+    rows = []
+    regressions = []
+    for name, result in results.items():
+        row = [name, 1e6*result["min"], 1e6*result["median"]]
+        
+        # Flag benchmarks slower than baseline by more than threshold
+        if baseline is not None and name in baseline["results"]:
+            base_time = baseline["results"][name]["min"]
+            change = result["min"]/base_time - 1.0
+            is_regression = change > threshold
+            row += [1e6*base_time, 100*change,
+                    "REGRESSION" if is_regression else ""]
+            if is_regression:
+                regressions.append(name)
+        else:
+            row += [None, None, ""]
+        
+        rows.append(row)
+    
+    return rows, regressions
+
+def main():
+    """
+    Run the benchmark suite from the command line, returning the exit
+    code (1 if any regression was found).
+    """
+    
+    # Parse arguments
+    parser = argparse.ArgumentParser(
+        description="Run the Helmholtz Cage microbenchmarks")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="store these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown vs. baseline (fraction)")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT,
+                        help="number of runs of each benchmark")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS),
+                        metavar="NAME", help="benchmarks to run")
+    args = parser.parse_args()
+    
+    # Run benchmarks
+    names = args.only if args.only else list(BENCHMARKS)
+    results = run_benchmarks(names, args.repeat)
+    
+    # Compare with baseline
+    baseline = load_results(BASELINE_FILE)
+    rows, regressions = compare_results(results, baseline, args.threshold)
+    headers = ["benchmark", "best (us)", "median (us)", "baseline (us)",
+               "change (%)", ""]
+    print(tabulate(rows, headers=headers, floatfmt="0.2f"))
+    
+    # Store results
+    time_str = datetime.datetime.now().strftime("%y%m%d_%H%M%S")
+    save_results("results_{}.json".format(time_str), results)
+    if args.save_baseline:
+        save_results(BASELINE_FILE, results)
+        print("Saved new baseline")
+    elif baseline is None:
+        print("WARN: No baseline saved (run with --save-baseline)")
+    
+    if regressions:
+        print("ERROR: {} benchmark(s) regressed by more than {:.0f}%".format(
+            len(regressions), 100*args.threshold))
+        return 1
+    
+    return 0
+
+
+if __name__ == "__main__":
+    
+    sys.exit(main())
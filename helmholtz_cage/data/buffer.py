@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+
+"""
+  A columnar, NumPy backed storage buffer for Helmholtz Cage data.
+  
+  Copyright 2026 UC CubeCats
+  All rights reserved. See LICENSE file at:
+  https://github.com/uccubecats/Helmholtz-Cage/LICENSE
+  Additional copyright may be held by others, as reflected in the commit
+  history.
+"""
+
+
+import numpy as np
+
+
+class ColumnBuffer(object):
+    """
+    A buffer storing rows of floating point data as one preallocated
+    array per labelled column.
+    
+    By default the buffer grows (doubling its capacity) as needed. In
+    ring mode the capacity is fixed and the oldest rows are overwritten
+    once full; each row is then written twice into a mirrored array so
+    that any window of stored rows is still a contiguous (zero-copy)
+    view.
+    """
+    
+    def __init__(self, labels, capacity=1024, ring=False, dtype=np.float64):
+        
+        # Store main parameters
+        self.labels = list(labels)
+        self.index = {label: i for i, label in enumerate(self.labels)}
+        self.capacity = max(1, int(capacity))
+        self.ring = ring
+        self.dtype = dtype
+        
+        # Initialize storage
+        self.clear()
+    
+    def __len__(self):
+        return self.length
+    
+    def clear(self):
+        """
+        Delete all stored rows (the allocated storage is kept).
+        """
+        
+        # Allocate storage if not done already
+        if not hasattr(self, "storage"):
+            if self.ring:
+                size = 2*self.capacity
+            else:
+                size = self.capacity
+            self.storage = np.zeros((len(self.labels), size), dtype=self.dtype)
+        
+        # Reset position variables
+        self.length = 0
+        self.head = 0
+        self.total = 0
+    
+    def append(self, point):
+        """
+        Append a single row, ordered the same as the labels.
+        """
+        
+        # Fixed size ring, write into both halves of mirrored storage
+        if self.ring:
+            self.storage[:, self.head] = point
+            self.storage[:, self.head + self.capacity] = point
+            self.head = (self.head + 1) % self.capacity
+            self.length = min(self.length + 1, self.capacity)
+        
+        # Growable buffer, allocate more space if full
+        else:
+            if self.length == self.capacity:
+                self.grow(2*self.capacity)
+            self.storage[:, self.length] = point
+            self.length += 1
+        
+        self.total += 1
+    
+    def extend(self, points):
+        """
+        Append a batch of rows (a sequence of rows, or an array with
+        shape (N, number of labels)).
+        """
+        
+        points = np.asarray(points, dtype=self.dtype)
+        if points.ndim != 2 or points.shape[0] == 0:
+            return
+        n = points.shape[0]
+        self.total += n
+        
+        # Fixed size ring, only the newest rows that fit need writing
+        if self.ring:
+            if n > self.capacity:
+                self.head = (self.head + n - self.capacity) % self.capacity
+                points = points[n - self.capacity:]
+                n = self.capacity
+            idx = (self.head + np.arange(n)) % self.capacity
+            self.storage[:, idx] = points.T
+            self.storage[:, idx + self.capacity] = points.T
+            self.head = (self.head + n) % self.capacity
+            self.length = min(self.length + n, self.capacity)
+        
+        # Growable buffer, allocate more space if needed
+        else:
+            if self.length + n > self.capacity:
+                self.grow(max(2*self.capacity, self.length + n))
+            self.storage[:, self.length:self.length + n] = points.T
+            self.length += n
+    
+    def grow(self, capacity):
+        """
+        Reallocate a growable buffer's storage with a larger capacity.
+        """
+        
+        storage = np.zeros((len(self.labels), capacity), dtype=self.dtype)
+        storage[:, :self.length] = self.storage[:, :self.length]
+        self.storage = storage
+        self.capacity = capacity
+    
+    def view(self, start=0, stop=None):
+        """
+        Retrieve a zero-copy view of all columns for the given row range
+        (relative to the oldest stored row), with shape (number of
+        labels, rows).
+        """
+        
+        # Handle python-style slice bounds
+        start, stop, _ = slice(start, stop).indices(self.length)
+        stop = max(start, stop)
+        
+        # Find where the oldest row is stored
+        if self.ring:
+            first = (self.head - self.length) % self.capacity
+        else:
+            first = 0
+        
+        return self.storage[:, first + start:first + stop]
+    
+    def column(self, label, start=0, stop=None):
+        """
+        Retrieve a zero-copy view of a single column.
+        """
+        
+        return self.view(start, stop)[self.index[label]]
+    
+    def row(self, i):
+        """
+        Retrieve a single row as a list of floats.
+        """
+        
+        # Handle negative indices
+        if i < 0:
+            i += self.length
+        if i < 0 or i >= self.length:
+            raise IndexError("Row index out of range")
+        
+        return self.view(i, i + 1)[:, 0].tolist()
+    
+    def take(self, indices):
+        """
+        Copy the rows at the given indices (or boolean mask) into a new
+        growable buffer.
+        """
+        
+        rows = self.view()[:, indices]
+        
+        subset = ColumnBuffer(self.labels, capacity=max(1, rows.shape[1]),
+                              dtype=self.dtype)
+        subset.storage[:, :rows.shape[1]] = rows
+        subset.length = rows.shape[1]
+        subset.total = rows.shape[1]
+        
+        return subset
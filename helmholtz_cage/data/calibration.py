@@ -9,13 +9,53 @@ history.
 """
 
 
+import hashlib
 import os
 
-import scipy
+import numpy as np
 
 from utilities.files import read_from_csv, write_to_csv
 
 
+def linear_regressions(X, Y, W=None):
+    """
+    Perform a batch of least-squares linear regressions at once, where
+    each row of X, Y (and optionally W) holds the predictor values,
+    response values and sample weights for one fit. Weights of 0 and 1
+    pick out which points are used by each fit.
+    
+    Returns arrays of the slopes, intercepts and r-values of each fit.
+    """
+    
+    X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+    Y = np.atleast_2d(np.asarray(Y, dtype=np.float64))
+    if W is None:
+        W = np.ones_like(X)
+    else:
+        W = np.atleast_2d(np.asarray(W, dtype=np.float64))
+    
+    with np.errstate(divide="ignore", invalid="ignore"):
+        
+        # Find weighted means
+        n = W.sum(axis=1)
+        x_mean = np.einsum("ij,ij->i", W, X)/n
+        y_mean = np.einsum("ij,ij->i", W, Y)/n
+        
+        # Find centered sums of squares and products
+        dx = (X - x_mean[:, None])*W
+        dy = (Y - y_mean[:, None])*W
+        sxx = np.einsum("ij,ij->i", dx, dx)
+        syy = np.einsum("ij,ij->i", dy, dy)
+        sxy = np.einsum("ij,ij->i", dx, dy)
+        
+        # Solve for line parameters
+        slope = sxy/sxx
+        intercept = y_mean - slope*x_mean
+        r_value = np.clip(sxy/np.sqrt(sxx*syy), -1.0, 1.0)
+    
+    return slope, intercept, r_value
+
+
 class LineEqn(object):
     """
     An object to hold a linear equation.
@@ -54,14 +94,26 @@ class LineEqn(object):
 class Calibration(object):
     """
     Helmholtz Cage calibration object.
+    
+    In "diagonal" mode, the voltage for each axis is found using only
+    that axis coil's equation. In "coupled" mode, the full 3x3 gain 
+    matrix G (where G[i, j] is the slope of B_i with coil j's voltage)
+    and offset vector b are used, solving B = G*V + b for V with a 
+    cached inverse of G.
     """
     
-    def __init__(self, file_dir, file_name):
+    def __init__(self, file_dir, file_name, mode="diagonal"):
         
         # Filename and directory
         self.file_name = file_name
         self.file_dir = file_dir
         
+        # Store field solving mode
+        if mode not in ("diagonal", "coupled"):
+            msg = "'{}' calibration mode not found".format(mode)
+            raise NotImplementedError(msg)
+        self.mode = mode
+        
         # Initialize calibration variables
         self.calibration_log_file = ""
         self.x_equations = {}
@@ -71,6 +123,13 @@ class Calibration(object):
         self.Ry = -1.0
         self.Rz = -1.0
         
+        # Initialize field solving matrices
+        self.gain = None
+        self.offset = None
+        self.inverse_gain = None
+        self.diagonal_slope = None
+        self.diagonal_intercept = None
+    
     def __str__(self):
                 
         output = "%==================================%\n" +\
@@ -101,56 +160,54 @@ class Calibration(object):
         each single-axis coil pair using linear regressions.
         """
         
-        x_points = []
-        y_points = []
-        z_points = []
-        
         # Determine which axis calibration data points belong to
-        for i in range(0,len(data.time)):
-            if data.x_req[i] == 0.0 and data.y_req[i] == 0.0 and data.z_req[i] == 0.0:
-                pass
-            elif data.x_req[i] != 0.0:
-                x_points.append(i)
-            elif data.y_req[i] != 0.0:
-                y_points.append(i)
-            elif data.z_req[i] != 0.0:
-                z_points.append(i)
-        
-        # Package each axis points into new data object
-        x_data = data.retrieve_data_subset(x_points)
-        y_data = data.retrieve_data_subset(y_points)
-        z_data = data.retrieve_data_subset(z_points)
-        
-        # Determine equations for each axis as well as influence on other axes
-        xx_equation = self.perform_linear_regression(x_data.Vx, x_data.Bx)
-        xy_equation = self.perform_linear_regression(x_data.Vx, x_data.By)
-        xz_equation = self.perform_linear_regression(x_data.Vx, x_data.Bz)
-        yx_equation = self.perform_linear_regression(y_data.Vy, y_data.Bx)
-        yy_equation = self.perform_linear_regression(y_data.Vy, y_data.By)
-        yz_equation = self.perform_linear_regression(y_data.Vy, y_data.Bz)
-        zx_equation = self.perform_linear_regression(z_data.Vz, z_data.Bx)
-        zy_equation = self.perform_linear_regression(z_data.Vz, z_data.By)
-        zz_equation = self.perform_linear_regression(z_data.Vz, z_data.Bz)
+        x_req = np.asarray(data.x_req)
+        y_req = np.asarray(data.y_req)
+        z_req = np.asarray(data.z_req)
+        x_mask = x_req != 0.0
+        y_mask = ~x_mask & (y_req != 0.0)
+        z_mask = ~x_mask & ~(y_req != 0.0) & (z_req != 0.0)
+        
+        # Check each axis has enough points to fit
+        for axis, mask in zip(["x", "y", "z"], [x_mask, y_mask, z_mask]):
+            if np.count_nonzero(mask) < 2:
+                print("WARN: Not enough {}-axis calibration points".format(
+                    axis))
+        
+        # Set up fits for each axis' influence on all axes, as well as
+        # its resistance (as predictor, response, and axis points)
+        V = [data.Vx, data.Vy, data.Vz]
+        I = [data.Ix, data.Iy, data.Iz]
+        B = [data.Bx, data.By, data.Bz]
+        masks = [x_mask, y_mask, z_mask]
+        X = [V[i] for i in range(0, 3) for j in range(0, 3)] + I
+        Y = [B[j] for i in range(0, 3) for j in range(0, 3)] + V
+        W = [masks[i] for i in range(0, 3) for j in range(0, 3)] + masks
+        
+        # Perform all linear regressions at once
+        slope, intercept, r_value = linear_regressions(X, Y, W)
+        eqns = [LineEqn(slope[k], intercept[k], r_value[k])
+                for k in range(0, 9)]
         
         # package Equations
-        self.x_equations = {"x": xx_equation,
-                            "y": xy_equation,
-                            "z": xz_equation}
-        self.y_equations = {"x": yx_equation,
-                            "y": yy_equation,
-                            "z": yz_equation}
-        self.z_equations = {"x": zx_equation,
-                            "y": zy_equation,
-                            "z": zz_equation}
+        self.x_equations = {"x": eqns[0],
+                            "y": eqns[1],
+                            "z": eqns[2]}
+        self.y_equations = {"x": eqns[3],
+                            "y": eqns[4],
+                            "z": eqns[5]}
+        self.z_equations = {"x": eqns[6],
+                            "y": eqns[7],
+                            "z": eqns[8]}
         
         # Determine resistance
-        x_iv = self.perform_linear_regression(x_data.Ix, x_data.Vx)
-        y_iv = self.perform_linear_regression(y_data.Iy, y_data.Vy)
-        z_iv = self.perform_linear_regression(z_data.Iz, z_data.Vz)
-        self.Rx = x_iv.slope
-        self.Ry = y_iv.slope
-        self.Rz = z_iv.slope
+        self.Rx = float(slope[9])
+        self.Ry = float(slope[10])
+        self.Rz = float(slope[11])
         
+        # Prepare field solving matrices
+        self.update_matrices()
+    
     def perform_linear_regression(self, X, Y):
         """
         Determine a linear regression of a data set, including a slope,
@@ -158,10 +215,10 @@ class Calibration(object):
         """
         
         # Perform linear regression
-        result = scipy.stats.linregress(X, Y)
+        slope, intercept, r_value = linear_regressions(X, Y)
         
         # Package result into equation object
-        equation = LineEqn(result.slope, result.intercept, result.rvalue)
+        equation = LineEqn(slope[0], intercept[0], r_value[0])
               
         return equation
         
@@ -253,23 +310,103 @@ class Calibration(object):
         self.Ry = float(content[5][6])
         self.Rz = float(content[9][6])
         
+        # Prepare field solving matrices
+        self.update_matrices()
+        
         return success
     
+    def update_matrices(self):
+        """
+        Assemble the gain matrix and offset vector from the calibration
+        equations, and cache the inverse of the gain matrix.
+        """
+        
+        coils = [self.x_equations, self.y_equations, self.z_equations]
+        axes = ["x", "y", "z"]
+        
+        # Collect slopes and intercepts (row: field axis, column: coil)
+        self.gain = np.array([[coils[j][axes[i]].slope for j in range(0, 3)]
+                              for i in range(0, 3)])
+        intercepts = np.array([[coils[j][axes[i]].intercept
+                                for j in range(0, 3)] for i in range(0, 3)])
+        
+        # Each coil's fits see the same ambient field, so average them
+        self.offset = intercepts.mean(axis=1)
+        
+        # Diagonal terms for single axis solving
+        self.diagonal_slope = np.diag(self.gain).copy()
+        self.diagonal_intercept = np.diag(intercepts).copy()
+        
+        # Invert the gain matrix once, rather than on every request
+        try:
+            self.inverse_gain = np.linalg.inv(self.gain)
+        except np.linalg.LinAlgError:
+            self.inverse_gain = None
+            if self.mode == "coupled":
+                print("WARN: Calibration gain matrix is singular, using "
+                      "diagonal terms only")
+    
+    def get_hash(self):
+        """
+        Create a hash identifying how this calibration converts fields
+        into voltages (from the arrays 'get_voltages_for_fields' uses).
+        """
+        
+        if self.mode == "coupled" and self.inverse_gain is not None:
+            arrays = [self.offset, self.inverse_gain]
+        else:
+            arrays = [self.diagonal_intercept, self.diagonal_slope]
+        
+        digest = hashlib.sha1(self.mode.encode("utf-8"))
+        for array in arrays:
+            digest.update(np.asarray(array, dtype=np.float64).tobytes())
+        
+        return digest.hexdigest()
+    
+    def get_voltages_for_fields(self, fields):
+        """
+        For the desired magnetic field(s), given as a length 3 vector or
+        an array of shape (N, 3), determine voltages for each axis coil
+        pair (in the same shape).
+        """
+        
+        fields = np.asarray(fields, dtype=np.float64)
+        
+        # Solve full coupled system
+        if self.mode == "coupled" and self.inverse_gain is not None:
+            voltages = (fields - self.offset) @ self.inverse_gain.T
+        
+        # Solve each axis on its own
+        else:
+            voltages = (fields - self.diagonal_intercept)/self.diagonal_slope
+        
+        return voltages
+    
+    def get_voltage_changes_for_fields(self, field_changes):
+        """
+        For desired change(s) in the magnetic field, determine the 
+        change in voltage needed for each axis coil pair (in the same 
+        shape).
+        """
+        
+        field_changes = np.asarray(field_changes, dtype=np.float64)
+        
+        if self.mode == "coupled" and self.inverse_gain is not None:
+            voltage_changes = field_changes @ self.inverse_gain.T
+        else:
+            voltage_changes = field_changes/self.diagonal_slope
+        
+        return voltage_changes
+    
     def get_voltage_for_desired_field(self, Bx, By, Bz):
         """
         For the desired magnetic field, determine voltages for each axis
         coil pair.
         
-        NOTE: Currently greatly simplified by ignoring influences of a
-              given coil voltage on other axis components of the
-              magnetic field.
-        TODO: Determine if corrections need to be added here to
-              compensate for these effects, or if they can be ignored if
-              calibration result is negligible.
+        NOTE: In "diagonal" mode, this ignores influences of a given coil
+              voltage on other axis components of the magnetic field.
         """
         
-        Vx = self.x_equations["x"].solve_for_x(Bx)
-        Vy = self.y_equations["y"].solve_for_x(By)
-        Vz = self.z_equations["z"].solve_for_x(Bz)
+        Vx, Vy, Vz = self.get_voltages_for_fields([Bx, By, Bz]).tolist()
         
         return Vx, Vy, Vz
@@ -14,18 +14,49 @@
 import datetime
 import os
 
-from tabulate import tabulate
-
+from data.buffer import ColumnBuffer
+from data.session_logger import SessionLogger, BinarySessionLogger
 from utilities.files import write_to_csv
 
 
+def column_property(label):
+    """
+    Create a read-only property giving a zero-copy view of a single
+    stored data column.
+    """
+    
+    def get_column(self):
+        return self.buffer.column(label)
+    
+    return property(get_column, doc="'{}' data column".format(label))
+
+
 class Data(object):
     """
     A class to store data and log data from from the Helmholtz Cage 
     during run.
+    
+    Data is stored column-wise in a NumPy backed buffer. If 'max_points'
+    is given, only the most recent points are kept in memory (using a
+    fixed-size ring buffer), otherwise the buffer grows as needed.
     """
     
-    def __init__(self, main_dir):
+    # Session data columns (views into the data buffer)
+    time = column_property("time")
+    Vx = column_property("Vx")
+    Vy = column_property("Vy")
+    Vz = column_property("Vz")
+    Ix = column_property("Ix")
+    Iy = column_property("Iy")
+    Iz = column_property("Iz")
+    Bx = column_property("Bx")
+    By = column_property("By")
+    Bz = column_property("Bz")
+    x_req = column_property("x_req")
+    y_req = column_property("y_req")
+    z_req = column_property("z_req")
+    
+    def __init__(self, main_dir, max_points=None):
         
         # Get session log file directory
         self.session_dir = os.path.join(main_dir, "sessions")
@@ -44,19 +75,6 @@ class Data(object):
         
         # Session logging data
         self.start_time = None
-        self.time = []
-        self.Vx = []
-        self.Vy = []
-        self.Vz = []
-        self.Ix = []
-        self.Iy = []
-        self.Iz = []
-        self.Bx = []
-        self.By = []
-        self.Bz = []
-        self.x_req = []
-        self.y_req = []
-        self.z_req = []
         self.req_type = "" # i.e. field vs. voltage
         
         # Store common elements for display and storage
@@ -84,9 +102,23 @@ class Data(object):
                       "gauss",
                       "gauss",
                       "gauss"]
+        
+        # Initialize data storage buffer
+        if max_points:
+            self.buffer = ColumnBuffer(self.labels, capacity=max_points,
+                                       ring=True)
+        else:
+            self.buffer = ColumnBuffer(self.labels)
+        
+        # Initialize streaming session logger
+        self.logger = None
     
     def __str__(self):
         
+        # NOTE: Imported here, as tabulate is slow to import and only
+        #       needed for printing
+        from tabulate import tabulate
+        
         # Create table headers
         output = "%==================================%\n" +\
                  "SESSION DATA\n" +\
@@ -109,31 +141,112 @@ class Data(object):
         Write the current data set to a csv file.
         """
         
+        # Add header information
+        header = self.create_file_header()
+        
+        # Add each time point as row in csv
+        data = []
+        for i in range(0, len(self.time)):
+            point = self.retrieve_data_point(i)
+            data.append(point)
+        
+        # Create file name
+        session_file = self.create_file_name("csv")
+        
+        # Write data to file
+        content = header + data
+        write_to_csv(self.session_dir, session_file, content, 'w')
+    
+    def create_file_header(self):
+        """
+        Create the header rows for a session file (session information,
+        data labels and units).
+        """
+        
         # Add header information
         header = [["request type", self.req_type],
                   ["calibration_file", self.calibration_file],
                   ["template_file", self.template_file]]
         
         # Add request units
+        units = [self.get_units()]
+        
+        return header + [self.labels] + units
+    
+    def create_file_metadata(self):
+        """
+        Create the metadata header for a binary session file.
+        """
+        
+        metadata = {"req_type": self.req_type,
+                    "calibration_file": self.calibration_file,
+                    "template_file": self.template_file,
+                    "start_time": self.start_time.isoformat(),
+                    "labels": self.labels,
+                    "units": self.get_units()}
+        
+        return metadata
+    
+    def get_units(self):
+        """
+        Get the units of each data label, including the request units
+        for the current request type.
+        """
+        
         if self.req_type == "voltage":
             req_unit = "volts"
         elif self.req_type == "field":
             req_unit = "gauss"
-        units = [self.units + [req_unit, req_unit, req_unit]]
+        else:
+            req_unit = ""
         
-        # Add each time point as row in csv
-        data = []
-        for i in range(0, len(self.time)):
-            point = self.retrieve_data_point(i)
-            data.append(point)
+        return self.units + [req_unit, req_unit, req_unit]
+    
+    def create_file_name(self, extension):
+        """
+        Create the session file name from the session start time.
+        """
         
-        # Create file name
         start_t_str = self.start_time.strftime("%y%m%d_%H%M%S")
-        session_file = "session_{}.csv".format(start_t_str)
         
-        # Write data to file
-        content = header + [self.labels] + units + data
-        write_to_csv(self.session_dir, session_file, content, 'w')
+        return "session_{}.{}".format(start_t_str, extension)
+    
+    def start_logging(self, flush_interval=1.0, fsync_interval=10.0,
+                      file_format="csv"):
+        """
+        Start streaming data points to a session file as they are added
+        (requires the start time to be set). The file can either be a
+        csv file, or a binary session file (see 'data.session_file').
+        """
+        
+        # Create logger for new session file
+        if file_format == "csv":
+            session_file = self.create_file_name("csv")
+            header = self.create_file_header()
+            self.logger = SessionLogger(self.session_dir, session_file, header,
+                                        flush_interval, fsync_interval)
+        elif file_format == "binary":
+            session_file = self.create_file_name("hcs")
+            metadata = self.create_file_metadata()
+            self.logger = BinarySessionLogger(self.session_dir, session_file,
+                                              metadata, flush_interval,
+                                              fsync_interval)
+        else:
+            msg = "Session file format '{}' not implemented".format(
+                file_format)
+            raise NotImplementedError(msg)
+        
+        # Start logging
+        self.logger.start()
+    
+    def stop_logging(self):
+        """
+        Stop streaming data points, finalizing the session file.
+        """
+        
+        if self.logger is not None:
+            self.logger.close()
+            self.logger = None
     
     def clear_data(self):
         """
@@ -141,46 +254,45 @@ class Data(object):
         """
         
         self.start_time = None
-        self.time = []
-        self.Vx = []
-        self.Vy = []
-        self.Vz = []
-        self.Ix = []
-        self.Iy = []
-        self.Iz = []
-        self.Bx = []
-        self.By = []
-        self.Bz = []
-        self.x_req = []
-        self.y_req = []
-        self.z_req = []
+        self.buffer.clear()
         self.req_type = ""
     
+    def add_point(self, point):
+        """
+        Append a single data point (ordered the same as 'labels') to the
+        stored session data.
+        """
+        
+        self.buffer.append(point)
+        
+        # Stream point to session file
+        if self.logger is not None:
+            self.logger.log([point])
+
+    def add_points(self, points):
+        """
+        Append a batch of data points (each ordered the same as 'labels')
+        to the stored session data.
+        """
+        
+        self.buffer.extend(points)
+        
+        # Stream points to session file
+        if self.logger is not None:
+            self.logger.log(points)
+    
     def retrieve_data_subset(self, indices):
         """
-        Given a list of indices, strip them out of the data, and place
-        them into a new Data object.
+        Given a list of indices (or a boolean mask), strip them out of 
+        the data, and place them into a new Data object.
         """
         
         subset = Data("")
         
         # Retrieve all data from indices
-        for i in indices:
-            subset.time.append(self.time[i])
-            subset.Vx.append(self.Vx[i])
-            subset.Vy.append(self.Vy[i])
-            subset.Vz.append(self.Vz[i])
-            subset.Ix.append(self.Ix[i])
-            subset.Iy.append(self.Iy[i])
-            subset.Iz.append(self.Iz[i])
-            subset.Bx.append(self.Bx[i])
-            subset.By.append(self.By[i])
-            subset.Bz.append(self.Bz[i])
-            subset.x_req.append(self.x_req[i])
-            subset.y_req.append(self.y_req[i])
-            subset.z_req.append(self.z_req[i])
-            subset.req_type = self.req_type
-            
+        subset.buffer = self.buffer.take(indices)
+        subset.req_type = self.req_type
+        
         return subset
     
     def retrieve_data_point(self, i):
@@ -188,18 +300,6 @@ class Data(object):
         Retrieve a specific data point based on its index.
         """
         
-        point = [self.time[i],
-                 self.Vx[i],
-                 self.Vy[i],
-                 self.Vz[i],
-                 self.Ix[i],
-                 self.Iy[i],
-                 self.Iz[i],
-                 self.Bx[i],
-                 self.By[i],
-                 self.Bz[i],
-                 self.x_req[i],
-                 self.y_req[i],
-                 self.z_req[i]]
+        point = self.buffer.row(i)
         
         return point
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+
+"""
+  Objects and functions for reading and writing binary Helmholtz Cage
+  session files.
+  
+  Copyright 2026 UC CubeCats
+  All rights reserved. See LICENSE file at:
+  https://github.com/uccubecats/Helmholtz-Cage/LICENSE
+  Additional copyright may be held by others, as reflected in the commit
+  history.
+  
+  File layout (all numbers little-endian):
+    
+    header:  b"HCSESS01", uint32 length, JSON metadata (session info,
+             labels, units), zero padded to a multiple of 8 bytes
+    chunks:  b"CHNK", uint32 rows, then float64 data stored column by
+             column (all rows of the first label, then the second...)
+    index:   one (uint64 offset, uint64 rows, float64 first time,
+             float64 last time) record per chunk
+    trailer: uint64 index offset, uint64 number of chunks, b"HCSIDX01"
+  
+  The index and trailer are only written when a session is closed; if
+  they are missing (e.g. after a crash) the chunks are scanned instead.
+"""
+
+
+import csv
+import json
+import os
+import struct
+import sys
+
+import numpy as np
+
+
+# Global constants
+HEADER_MAGIC = b"HCSESS01"
+CHUNK_MAGIC = b"CHNK"
+TRAILER_MAGIC = b"HCSIDX01"
+TRAILER_SIZE = 24
+INDEX_DTYPE = np.dtype([("offset", "<u8"),
+                        ("rows", "<u8"),
+                        ("t_first", "<f8"),
+                        ("t_last", "<f8")])
+
+
+def encode_header(metadata):
+    """
+    Create the binary header bytes for the given metadata dict.
+    """
+    
+    content = json.dumps(metadata).encode("utf-8")
+    header = HEADER_MAGIC + struct.pack("<I", len(content)) + content
+    padding = (-len(header)) % 8
+    
+    return header + b"\0"*padding
+
+def encode_chunk(columns):
+    """
+    Create the binary bytes for a chunk of data, given as an array of
+    shape (number of labels, rows).
+    """
+    
+    columns = np.ascontiguousarray(columns, dtype="<f8")
+    
+    return CHUNK_MAGIC + struct.pack("<I", columns.shape[1]) + \
+        columns.tobytes()
+
+def encode_index(index, offset):
+    """
+    Create the binary bytes for the chunk index and file trailer, where
+    the index is a list of (offset, rows, first time, last time) and is
+    written at the given file offset.
+    """
+    
+    records = np.array(index, dtype=INDEX_DTYPE)
+    trailer = struct.pack("<QQ", offset, len(records)) + TRAILER_MAGIC
+    
+    return records.tobytes() + trailer
+
+def convert_to_csv(file_path, csv_path=None):
+    """
+    Convert a binary session file into a csv session file (with the
+    same header rows as csv session logging). Data is converted one
+    chunk at a time.
+    """
+    
+    # Default to the same name, with a csv extension
+    if csv_path is None:
+        csv_path = os.path.splitext(file_path)[0] + ".csv"
+    
+    session = SessionFile(file_path)
+    metadata = session.metadata
+    
+    with open(csv_path, 'w', newline='') as csv_file:
+        csv_writer = csv.writer(csv_file)
+        
+        # Write header information
+        csv_writer.writerow(["request type", metadata["req_type"]])
+        csv_writer.writerow(["calibration_file", metadata["calibration_file"]])
+        csv_writer.writerow(["template_file", metadata["template_file"]])
+        csv_writer.writerow(metadata["labels"])
+        csv_writer.writerow(metadata["units"])
+        
+        # Write each chunk's rows
+        for i in range(0, len(session.index)):
+            csv_writer.writerows(session.read_chunk(i).T.tolist())
+    
+    session.close()
+    
+    return csv_path
+
+
+class SessionFile(object):
+    """
+    An object for reading a binary session file. The file is memory-
+    mapped, so only the chunks covering a requested time range are
+    actually read from storage.
+    """
+    
+    def __init__(self, file_path):
+        
+        # Store main parameters
+        self.file_path = file_path
+        
+        # Memory-map the file
+        self.map = np.memmap(file_path, dtype=np.uint8, mode='r')
+        
+        # Read header
+        if bytes(self.map[:8]) != HEADER_MAGIC:
+            raise ValueError("'{}' is not a session file".format(file_path))
+        length = struct.unpack("<I", bytes(self.map[8:12]))[0]
+        self.metadata = json.loads(bytes(self.map[12:12 + length]))
+        self.labels = self.metadata["labels"]
+        self.data_start = 12 + length + (-(12 + length)) % 8
+        
+        # Read chunk index
+        self.index = self.read_index()
+    
+    def read_index(self):
+        """
+        Read the chunk index from the end of the file, or rebuild it by
+        scanning the chunks if the file was not closed properly.
+        """
+        
+        size = len(self.map)
+        
+        # Read index using file trailer
+        if size >= self.data_start + TRAILER_SIZE and \
+                bytes(self.map[size - 8:]) == TRAILER_MAGIC:
+            offset, n_chunks = struct.unpack(
+                "<QQ", bytes(self.map[size - TRAILER_SIZE:size - 8]))
+            return np.frombuffer(self.map, dtype=INDEX_DTYPE,
+                                 count=n_chunks, offset=offset)
+        
+        # Otherwise, scan through the chunks
+        print("WARN: '{}' has no index, scanning chunks".format(
+            self.file_path))
+        index = []
+        offset = self.data_start
+        row_size = 8*len(self.labels)
+        while offset + 8 <= size and \
+                bytes(self.map[offset:offset + 4]) == CHUNK_MAGIC:
+            rows = struct.unpack("<I", bytes(self.map[offset + 4:offset + 8]))[0]
+            if offset + 8 + rows*row_size > size:
+                break
+            time = np.frombuffer(self.map, dtype="<f8", count=rows,
+                                 offset=offset + 8)
+            index.append((offset, rows, time[0], time[-1]))
+            offset += 8 + rows*row_size
+        
+        return np.array(index, dtype=INDEX_DTYPE)
+    
+    def read_chunk(self, i):
+        """
+        Retrieve a zero-copy view of a single chunk's data, with shape
+        (number of labels, rows).
+        """
+        
+        offset = int(self.index["offset"][i])
+        rows = int(self.index["rows"][i])
+        data = np.frombuffer(self.map, dtype="<f8",
+                             count=rows*len(self.labels), offset=offset + 8)
+        
+        return data.reshape(len(self.labels), rows)
+    
+    def read_range(self, t_start=None, t_end=None, labels=None):
+        """
+        Retrieve the data between two times (or the whole session) as a
+        dict of arrays, only reading the chunks that overlap the range.
+        """
+        
+        if labels is None:
+            labels = self.labels
+        rows = [self.labels.index(label) for label in labels]
+        
+        # Find chunks overlapping the time range
+        first = 0
+        last = len(self.index)
+        if t_start is not None:
+            first = int(np.searchsorted(self.index["t_last"], t_start))
+        if t_end is not None:
+            last = int(np.searchsorted(self.index["t_first"], t_end,
+                                       side="right"))
+        
+        # Read data from chunks
+        chunks = [self.read_chunk(i) for i in range(first, last)]
+        if chunks:
+            data = np.concatenate(chunks, axis=1)
+        else:
+            data = np.zeros((len(self.labels), 0))
+        
+        # Trim to exact time range
+        time = data[self.labels.index("time")]
+        mask = np.ones(data.shape[1], dtype=bool)
+        if t_start is not None:
+            mask &= time >= t_start
+        if t_end is not None:
+            mask &= time <= t_end
+        
+        return {label: data[row][mask] for label, row in zip(labels, rows)}
+    
+    def close(self):
+        """
+        Release the memory-mapped file.
+        """
+        
+        self.index = None
+        self.map = None
+
+
+if __name__ == "__main__":
+    
+    # Convert binary session files given on the command line to csv
+    if len(sys.argv) < 2:
+        print("Usage: session_file.py SESSION_FILE [SESSION_FILE ...]")
+        sys.exit(1)
+    
+    for file_path in sys.argv[1:]:
+        print("Converted to {}".format(convert_to_csv(file_path)))
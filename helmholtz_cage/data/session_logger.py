@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+
+"""
+  Objects for streaming Helmholtz Cage session data to storage during
+  a run.
+  
+  Copyright 2026 UC CubeCats
+  All rights reserved. See LICENSE file at:
+  https://github.com/uccubecats/Helmholtz-Cage/LICENSE
+  Additional copyright may be held by others, as reflected in the commit
+  history.
+"""
+
+
+import csv
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+from data.session_file import encode_header, encode_chunk, encode_index
+
+
+class SessionLogger(object):
+    """
+    An object which appends batches of session data points to a csv file
+    from a background thread as they arrive.
+    
+    Batches wait in a bounded queue (so memory use stays bounded, with
+    the caller waiting if the disk falls that far behind). The file is
+    flushed every 'flush_interval' seconds and synced to disk every
+    'fsync_interval' seconds, so little is lost if the program or
+    computer dies mid-run.
+    """
+    
+    def __init__(self, file_dir, file_name, header, flush_interval=1.0,
+                 fsync_interval=10.0, max_batches=1000):
+        
+        # Store main parameters
+        self.file_dir = file_dir
+        self.file_name = file_name
+        self.file_path = os.path.join(file_dir, file_name)
+        self.header = header
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        
+        # Initialize batch queue
+        self.batches = queue.Queue(maxsize=max_batches)
+        
+        # Initialize variables
+        self.file = None
+        self.thread = None
+        self.is_running = False
+        self.rows_written = 0
+        self.error = None
+    
+    def start(self):
+        """
+        Create the session file, write its header, and start the writer
+        thread.
+        """
+        
+        # Create file and write header
+        self.file = self.open_file()
+        self.writer = self.create_writer(self.file)
+        self.write_header(self.header)
+        self.sync()
+        
+        # Start thread
+        self.thread = threading.Thread(target=self.run,
+                                       name="session logger",
+                                       daemon=True)
+        self.is_running = True
+        self.thread.start()
+    
+    def open_file(self):
+        """
+        Create and open the session file.
+        """
+        
+        return open(self.file_path, 'w', newline='')
+    
+    def create_writer(self, file):
+        """
+        Create the row writer object for the session file.
+        """
+        
+        return csv.writer(file)
+    
+    def write_header(self, header):
+        """
+        Write the header rows at the start of the session file.
+        """
+        
+        for row in header:
+            self.writer.writerow(row)
+    
+    def write_batch(self, points):
+        """
+        Write a batch of data points to the session file.
+        """
+        
+        self.writer.writerows(points)
+    
+    def log(self, points):
+        """
+        Queue a batch of data points (a list of rows, or an array) to be
+        written.
+        """
+        
+        if not self.is_running or len(points) == 0:
+            return
+        
+        if hasattr(points, "tolist"):
+            points = points.tolist()
+        self.batches.put(points)
+    
+    def run(self):
+        """
+        Writing loop run by the logging thread.
+        """
+        
+        last_flush = time.monotonic()
+        last_sync = last_flush
+        
+        while True:
+            
+            # Wait for next batch (None signals the logger to close)
+            try:
+                points = self.batches.get(timeout=self.flush_interval)
+            except queue.Empty:
+                points = []
+            if points is None:
+                break
+            
+            # Write batch (if any data arrived)
+            try:
+                if len(points) > 0:
+                    self.write_batch(points)
+                    self.rows_written += len(points)
+                
+                # Periodically flush and sync file
+                now = time.monotonic()
+                if now - last_sync >= self.fsync_interval:
+                    self.sync()
+                    last_sync = now
+                    last_flush = now
+                elif now - last_flush >= self.flush_interval:
+                    self.flush()
+                    last_flush = now
+            
+            except Exception as err:
+                self.error = err
+                print("ERROR: Unable to write session data | {}".format(err))
+    
+    def flush(self):
+        """
+        Flush any buffered data to the file.
+        """
+        
+        self.file.flush()
+    
+    def sync(self):
+        """
+        Flush the file and ask the OS to write it to disk.
+        """
+        
+        self.flush()
+        os.fsync(self.file.fileno())
+    
+    def close(self):
+        """
+        Write any remaining batches, then finalize and close the file.
+        """
+        
+        if not self.is_running:
+            return
+        
+        # Signal and wait for thread to finish
+        self.batches.put(None)
+        self.thread.join()
+        self.is_running = False
+        
+        # Finalize the file
+        self.finalize()
+        self.sync()
+        self.file.close()
+        print("Session data written to {}".format(self.file_path))
+    
+    def finalize(self):
+        """
+        Write anything required at the end of the session file.
+        """
+        pass
+
+
+class BinarySessionLogger(SessionLogger):
+    """
+    A session logger which writes the binary, chunked session file
+    format (see 'data.session_file'), with a dict of session metadata as
+    its header.
+    
+    Rows are collected until 'chunk_rows' are waiting or the file is
+    flushed, then written as one column-wise chunk. The chunk index is
+    written when the logger is closed.
+    """
+    
+    def __init__(self, file_dir, file_name, header, flush_interval=1.0,
+                 fsync_interval=10.0, max_batches=1000, chunk_rows=4096):
+        
+        # Initialize parent class
+        super().__init__(file_dir, file_name, header, flush_interval,
+                         fsync_interval, max_batches)
+        
+        # Initialize chunk variables
+        self.chunk_rows = chunk_rows
+        self.pending = []
+        self.pending_rows = 0
+        self.index = []
+    
+    def open_file(self):
+        
+        return open(self.file_path, 'wb')
+    
+    def create_writer(self, file):
+        
+        return None
+    
+    def write_header(self, header):
+        
+        self.file.write(encode_header(header))
+    
+    def write_batch(self, points):
+        
+        # Collect rows until a chunk is full
+        self.pending.append(np.asarray(points, dtype=np.float64))
+        self.pending_rows += len(points)
+        if self.pending_rows >= self.chunk_rows:
+            self.write_chunk()
+    
+    def write_chunk(self):
+        """
+        Write all pending rows as a single chunk, and add it to the chunk
+        index.
+        """
+        
+        if self.pending_rows == 0:
+            return
+        
+        # Arrange rows column-wise
+        columns = np.concatenate(self.pending, axis=0).T
+        self.pending = []
+        self.pending_rows = 0
+        
+        # Write chunk
+        offset = self.file.tell()
+        self.file.write(encode_chunk(columns))
+        self.index.append((offset, columns.shape[1], columns[0, 0],
+                           columns[0, -1]))
+    
+    def flush(self):
+        
+        self.write_chunk()
+        self.file.flush()
+    
+    def finalize(self):
+        
+        # Write any remaining rows and the chunk index
+        self.write_chunk()
+        offset = self.file.tell()
+        self.file.write(encode_index(self.index, offset))
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+
+"""
+  Background data acquisition engine for the Helmholtz Cage.
+  
+  Copyright 2026 UC CubeCats
+  All rights reserved. See LICENSE file at:
+  https://github.com/uccubecats/Helmholtz-Cage/LICENSE
+  Additional copyright may be held by others, as reflected in the commit
+  history.
+"""
+
+
+import queue
+import threading
+import time
+
+
+class AcquisitionEngine(object):
+    """
+    An object which samples the cage instruments from its own thread at
+    a fixed rate, handing each sample off through a thread-safe queue.
+    
+    NOTE: The sampling function is called from the acquisition thread,
+          so anything it touches must be safe to use from there.
+    """
+    
+    def __init__(self, sample_func, rate, max_queue=10000):
+        
+        # Store main parameters
+        self.sample_func = sample_func
+        self.rate = float(rate)
+        self.period = 1.0/self.rate
+        
+        # Initialize sample hand-off queue
+        self.samples = queue.Queue(maxsize=max_queue)
+        
+        # Initialize thread handling variables
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.is_running = False
+        
+        # Initialize statistics
+        self.sample_count = 0
+        self.overrun_count = 0
+        self.dropped_count = 0
+        self.error_count = 0
+    
+    def start(self):
+        """
+        Start sampling in a new background thread.
+        """
+        
+        # Don't start a second thread if already running
+        if self.is_running:
+            print("WARN: Acquisition engine is already running")
+            return False
+        
+        # Reset statistics and queue for new run
+        self.sample_count = 0
+        self.overrun_count = 0
+        self.dropped_count = 0
+        self.error_count = 0
+        self.get_samples()
+        
+        # Start thread
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run,
+                                       name="acquisition",
+                                       daemon=True)
+        self.is_running = True
+        self.thread.start()
+        
+        return True
+    
+    def stop(self, timeout=2.0):
+        """
+        Stop the background thread, waiting for the current sample to
+        finish.
+        """
+        
+        # Signal and wait for thread to finish
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+            if self.thread.is_alive():
+                print("WARN: Acquisition thread did not stop in time")
+        
+        self.thread = None
+        self.is_running = False
+    
+    def run(self):
+        """
+        Sampling loop run by the acquisition thread, scheduled off of
+        absolute deadlines so that sampling time does not accumulate.
+        """
+        
+        next_time = time.perf_counter()
+        
+        while not self.stop_event.is_set():
+            
+            # Take sample
+            try:
+                sample = self.sample_func()
+            except Exception as err:
+                self.error_count += 1
+                print("ERROR: Acquisition failed | {}".format(err))
+                sample = None
+            
+            # Hand sample off, without ever blocking on the consumer
+            if sample is not None:
+                try:
+                    self.samples.put_nowait(sample)
+                    self.sample_count += 1
+                except queue.Full:
+                    self.dropped_count += 1
+            
+            # Determine next deadline, skipping any missed ones
+            next_time += self.period
+            now = time.perf_counter()
+            if now > next_time:
+                missed = int((now - next_time)/self.period) + 1
+                self.overrun_count += missed
+                next_time += missed*self.period
+            
+            # Wait until next deadline (or until told to stop)
+            self.stop_event.wait(max(0.0, next_time - time.perf_counter()))
+    
+    def get_samples(self):
+        """
+        Retrieve all samples currently waiting in the queue, without
+        blocking.
+        """
+        
+        samples = []
+        while True:
+            try:
+                samples.append(self.samples.get_nowait())
+            except queue.Empty:
+                break
+        
+        return samples
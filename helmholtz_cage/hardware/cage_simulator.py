@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+
+"""
+  Physics-based simulation of a Helmholtz Cage, shared by the fake
+  power supplies and magnetometer.
+  
+  Copyright 2026 UC CubeCats
+  All rights reserved. See LICENSE file at:
+  https://github.com/uccubecats/Helmholtz-Cage/LICENSE
+  Additional copyright may be held by others, as reflected in the commit
+  history.
+"""
+
+
+import threading
+import time
+
+import numpy as np
+
+
+# Global constants
+AXES = ["x-axis", "y-axis", "z-axis"]
+DEFAULT_PARAMS = {
+    "gain": [[10.0, 0.3, 0.1],
+             [0.2, 10.0, 0.3],
+             [0.1, 0.2, 10.0]], # gauss/amp
+    "resistance": [10.0, 10.0, 10.0], # ohms
+    "inductance": [0.05, 0.05, 0.05], # henries
+    "max_current": [1.0, 1.0, 1.0], # amps
+    "ambient_field": [0.2, -0.05, 0.45], # gauss
+    "output_noise": 0.001, # volts/amps
+    "sensor_noise": 0.005, # gauss
+    "sensor_lag": 0.01, # secs
+    "latency": {"set_voltage": 0.0,
+                "get_output": 0.0,
+                "read_field": 0.0}, # secs
+    "seed": None
+}
+
+
+class CageSimulator(object):
+    """
+    An object simulating the coils and field of a Helmholtz Cage in real
+    time, so control loops, calibration and throughput can be tested
+    without the actual cage.
+    
+    Each coil pair is modelled as an inductor and resistor driven by its
+    power supply voltage (with a current limit). The field is the
+    ambient field plus the coil currents through a coupling (gain)
+    matrix, as seen through a first-order sensor lag with added noise.
+    Each instrument call can also be given an I/O latency.
+    
+    The state is advanced in closed form to the current time whenever
+    it is accessed, so no simulation thread is needed.
+    """
+    
+    def __init__(self, params=None):
+        
+        # Store parameters (using defaults for any not given)
+        if params is None:
+            params = {}
+        self.params = dict(DEFAULT_PARAMS, **params)
+        self.gain = np.array(self.params["gain"], dtype=np.float64)
+        self.resistance = np.array(self.params["resistance"], dtype=np.float64)
+        self.inductance = np.array(self.params["inductance"], dtype=np.float64)
+        self.max_current = np.array(self.params["max_current"],
+                                    dtype=np.float64)
+        self.ambient_field = np.array(self.params["ambient_field"],
+                                      dtype=np.float64)
+        self.output_noise = self.params["output_noise"]
+        self.sensor_noise = self.params["sensor_noise"]
+        self.sensor_lag = self.params["sensor_lag"]
+        self.latency = dict(DEFAULT_PARAMS["latency"],
+                            **self.params["latency"])
+        self.rng = np.random.default_rng(self.params["seed"])
+        
+        # Initialize state
+        self.voltages = np.zeros(3)
+        self.currents = np.zeros(3)
+        self.sensed_field = self.ambient_field.copy()
+        self.last_time = time.perf_counter()
+        self.lock = threading.Lock()
+    
+    def advance(self):
+        """
+        Advance the coil currents and sensed field to the current time.
+        
+        NOTE: Must be called with the lock held.
+        """
+        
+        now = time.perf_counter()
+        dt = now - self.last_time
+        self.last_time = now
+        if dt <= 0.0:
+            return
+        
+        # Decay each coil current towards its steady state value
+        target = np.clip(self.voltages/self.resistance, -self.max_current,
+                         self.max_current)
+        decay = np.exp(-dt*self.resistance/self.inductance)
+        self.currents = target + (self.currents - target)*decay
+        
+        # Lag the sensed field behind the actual field
+        field = self.ambient_field + self.gain @ self.currents
+        if self.sensor_lag > 0.0:
+            decay = np.exp(-dt/self.sensor_lag)
+            self.sensed_field = field + (self.sensed_field - field)*decay
+        else:
+            self.sensed_field = field
+    
+    def wait(self, operation):
+        """
+        Wait out the I/O latency of an instrument operation.
+        """
+        
+        latency = self.latency.get(operation, 0.0)
+        if latency > 0.0:
+            time.sleep(latency)
+    
+    def set_voltage(self, axis, voltage):
+        """
+        Set the voltage driving an axis' coil pair.
+        """
+        
+        self.wait("set_voltage")
+        
+        with self.lock:
+            self.advance()
+            self.voltages[AXES.index(axis)] = voltage
+    
+    def get_outputs(self, axis):
+        """
+        Get the measured output voltage and current of an axis' power
+        supply.
+        """
+        
+        self.wait("get_output")
+        i = AXES.index(axis)
+        
+        with self.lock:
+            self.advance()
+            noise = self.rng.normal(0.0, self.output_noise, 2)
+            v_out = self.voltages[i] + noise[0]
+            i_out = self.currents[i] + noise[1]
+        
+        return float(v_out), float(i_out)
+    
+    def read_field(self):
+        """
+        Get the magnetic field measured by the magnetometer.
+        """
+        
+        self.wait("read_field")
+        
+        with self.lock:
+            self.advance()
+            noise = self.rng.normal(0.0, self.sensor_noise, 3)
+            field = self.sensed_field + noise
+        
+        return field.tolist()
+    
+    def get_field(self):
+        """
+        Get the actual (noise and lag free) magnetic field inside the
+        cage.
+        """
+        
+        with self.lock:
+            self.advance()
+            field = self.ambient_field + self.gain @ self.currents
+        
+        return field.tolist()
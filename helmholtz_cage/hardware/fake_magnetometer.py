@@ -13,15 +13,23 @@
 
 
 import random
+import time
 
 
 class FakeMagnetometer(object):
     """
     An object for interfacing with magnetometers using a serial 
     interface.
+    
+    NOTE: If given a cage simulator, readings come from its field model
+          rather than random noise.
     """
     
-    def __init__(self):
+    def __init__(self, sample_rate=100.0, simulator=None):
+        
+        # Store main parameters
+        self.sample_rate = sample_rate
+        self.simulator = simulator
         
         # Initialize state variables
         self.connected = False
@@ -41,9 +49,21 @@ class FakeMagnetometer(object):
         Pretend to get the actual measured magnetic field strength.
         """
         
+        if self.simulator is not None:
+            return self.simulator.read_field()
+        
         # Generate some random data
         data = [None]*3
         for i in range(0,3):
             data[i] = random.uniform(-0.5, 0.5)
             
         return data
+    
+    def read_samples(self):
+        """
+        Pretend to wait for the next streamed magnetometer sample.
+        """
+        
+        time.sleep(1.0/self.sample_rate)
+        
+        return [(self.read_sensor(), True)]
@@ -19,12 +19,16 @@ class FakePowerSupply(object):
     """
     An object for faking a GPIB-capable power supply device within the
     Helmholtz Cage operating software.
+    
+    NOTE: If given a cage simulator, outputs come from its coil model
+          rather than a bare V/R.
     """
     
-    def __init__(self, axis):
+    def __init__(self, axis, simulator=None):
         
         # Set parameters
         self.axis = axis
+        self.simulator = simulator
         self.is_connected = False
         self.v_lim = 10.0
         self.i_lim = 1.0
@@ -46,6 +50,9 @@ class FakePowerSupply(object):
         Pretend to send voltage command.
         """
         
+        if self.simulator is not None:
+            self.simulator.set_voltage(self.axis, v)
+        
         self.v = v
         self.i = self.v/self.r
         
@@ -56,6 +63,9 @@ class FakePowerSupply(object):
         Get out fake voltage value.
         """
         
+        if self.simulator is not None:
+            return self.simulator.get_outputs(self.axis)[0]
+        
         v_out = self.v + random.uniform(-0.01, 0.01)
         
         return v_out
@@ -65,6 +75,19 @@ class FakePowerSupply(object):
         Get out fake current value.
         """
         
+        if self.simulator is not None:
+            return self.simulator.get_outputs(self.axis)[1]
+        
         i_out = self.i + random.uniform(-0.01, 0.01)
         
         return i_out
+    
+    def get_outputs(self):
+        """
+        Get out fake voltage and current values.
+        """
+        
+        if self.simulator is not None:
+            return self.simulator.get_outputs(self.axis)
+        
+        return self.get_voltage_output(), self.get_current_output()
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+
+"""
+  Closed-loop magnetic field controller for the Helmholtz Cage.
+  
+  Copyright 2026 UC CubeCats
+  All rights reserved. See LICENSE file at:
+  https://github.com/uccubecats/Helmholtz-Cage/LICENSE
+  Additional copyright may be held by others, as reflected in the commit
+  history.
+"""
+
+
+import threading
+import time
+
+import numpy as np
+
+from data.buffer import ColumnBuffer
+from utilities.files import write_to_csv
+
+
+class FieldController(object):
+    """
+    An object which holds the measured magnetic field at a target value
+    from its own thread, stepping at a fixed rate.
+    
+    Each step, the coil voltages are set to the calibration's voltages
+    for the target field (feedforward), plus a PI correction of the
+    field error converted to voltages through the calibration. The
+    integral is held on any axis whose voltage is at its limit (anti-
+    windup). The timing and tracking error of every step are logged.
+    """
+    
+    def __init__(self, calibration, read_func, send_func, rate=50.0,
+                 kp=0.5, ki=2.0, v_min=None, v_max=None):
+        
+        # Store main parameters
+        self.calibration = calibration
+        self.read_func = read_func
+        self.send_func = send_func
+        self.rate = float(rate)
+        self.period = 1.0/self.rate
+        self.kp = kp
+        self.ki = ki
+        
+        # Store voltage limits
+        if v_min is None:
+            v_min = [-np.inf]*3
+        if v_max is None:
+            v_max = [np.inf]*3
+        self.v_min = np.asarray(v_min, dtype=np.float64)
+        self.v_max = np.asarray(v_max, dtype=np.float64)
+        
+        # Initialize control state
+        self.target = None
+        self.feedforward = None
+        self.integral = np.zeros(3)
+        self.voltages = np.zeros(3)
+        
+        # Initialize thread handling variables
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.is_running = False
+        
+        # Initialize step log
+        self.log = ColumnBuffer(["time", "lateness", "duration", "Bx_err",
+                                 "By_err", "Bz_err", "Vx", "Vy", "Vz"])
+        self.overrun_count = 0
+        self.invalid_count = 0
+    
+    def set_target(self, fields, voltages=None):
+        """
+        Set the target magnetic field, optionally with its feedforward
+        voltages (otherwise solved using the calibration).
+        """
+        
+        fields = np.asarray(fields, dtype=np.float64)
+        if voltages is None:
+            voltages = self.calibration.get_voltages_for_fields(fields)
+        
+        # Replace both at once, as they are read by the control thread
+        self.target, self.feedforward = fields, np.asarray(voltages)
+    
+    def start(self):
+        """
+        Start controlling the field in a new background thread.
+        """
+        
+        self.stop_event.clear()
+        self.integral = np.zeros(3)
+        self.log.clear()
+        self.overrun_count = 0
+        self.invalid_count = 0
+        self.thread = threading.Thread(target=self.run,
+                                       name="field controller",
+                                       daemon=True)
+        self.is_running = True
+        self.thread.start()
+    
+    def stop(self, timeout=2.0):
+        """
+        Stop the background thread, waiting for the current step to
+        finish.
+        """
+        
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
+        self.is_running = False
+    
+    def run(self):
+        """
+        Control loop run by the controller thread.
+        """
+        
+        start_time = time.perf_counter()
+        next_time = start_time
+        
+        while not self.stop_event.is_set():
+            
+            # Run control step
+            step_start = time.perf_counter()
+            try:
+                self.step(step_start - start_time, step_start - next_time)
+            except Exception as err:
+                print("ERROR: Field control step failed | {}".format(err))
+            
+            # Wait for next step, skipping any missed ones
+            next_time += self.period
+            now = time.perf_counter()
+            if now > next_time:
+                self.overrun_count += 1
+                next_time = now
+            self.stop_event.wait(next_time - now)
+        
+        self.is_running = False
+    
+    def step(self, elapsed, lateness):
+        """
+        Measure the field and command corrected coil voltages.
+        """
+        
+        # Nothing to do until a target is given
+        target, feedforward = self.target, self.feedforward
+        if target is None:
+            return
+        step_start = time.perf_counter()
+        
+        # Find field error, skipping feedback for invalid readings
+        measured = np.asarray(self.read_func(), dtype=np.float64)
+        if np.all(np.isfinite(measured)) and np.all(np.abs(measured) < 999.0):
+            error = target - measured
+        else:
+            error = np.zeros(3)
+            self.invalid_count += 1
+        
+        # Integrate error, except on axes already at their limits
+        integral = self.integral + error*self.period
+        correction = self.calibration.get_voltage_changes_for_fields(
+            self.kp*error + self.ki*integral)
+        voltages = feedforward + correction
+        is_saturated = (voltages > self.v_max) | (voltages < self.v_min)
+        self.integral = np.where(is_saturated, self.integral, integral)
+        voltages = np.clip(voltages, self.v_min, self.v_max)
+        
+        # Command voltages
+        self.send_func(voltages.tolist())
+        self.voltages = voltages
+        
+        # Log step
+        duration = time.perf_counter() - step_start
+        self.log.append([elapsed, lateness, duration] + error.tolist() +
+                        voltages.tolist())
+    
+    def summary(self):
+        """
+        Summarize the timing and tracking error of the steps run so far.
+        """
+        
+        n = len(self.log)
+        if n == 0:
+            return "no control steps run"
+        
+        duration = self.log.column("duration")
+        error = self.log.view()[3:6]
+        rms_error = np.sqrt(np.mean(error**2, axis=1))
+        
+        summary = "{} steps ({} overruns, {} invalid readings) | step " \
+                  "(ms) mean: {:.3f}, max: {:.3f} | rms error: {:.4f}, " \
+                  "{:.4f}, {:.4f}".format(n, self.overrun_count,
+                                          self.invalid_count,
+                                          1000*np.mean(duration),
+                                          1000*np.max(duration),
+                                          *rms_error)
+        
+        return summary
+    
+    def write_to_file(self, file_dir, file_name):
+        """
+        Write the timing, tracking error and commanded voltages of each
+        step to a csv file.
+        """
+        
+        content = [self.log.labels,
+                   ["secs", "secs", "secs", "gauss", "gauss", "gauss", "volts",
+                    "volts", "volts"]]
+        content += self.log.view().T.tolist()
+        
+        write_to_csv(file_dir, file_name, content, 'w')
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+
+"""
+  Background reader for continuously streaming magnetometer samples.
+  
+  Copyright 2026 UC CubeCats
+  All rights reserved. See LICENSE file at:
+  https://github.com/uccubecats/Helmholtz-Cage/LICENSE
+  Additional copyright may be held by others, as reflected in the commit
+  history.
+"""
+
+
+import threading
+import time
+
+import numpy as np
+
+from data.buffer import ColumnBuffer
+
+
+# Global constants
+INVALID_FIELD = [999.0, 999.0, 999.0]
+IDLE_WAIT = 0.002 # secs
+
+
+class FieldReader(object):
+    """
+    An object which continuously reads samples from a magnetometer on
+    its own thread, keeping the newest 'capacity' of them (timestamped)
+    in a ring buffer.
+    
+    The read function should return a list of the (values, is_valid)
+    pairs of any new samples, with None for any lines lost. If it
+    returns none (e.g. a serial port with a zero timeout), the reader
+    waits briefly before trying again, rather than spinning.
+    
+    Samples older than 'max_age' seconds are treated as stale, so a
+    stopped sensor or link reads as invalid rather than frozen.
+    """
+    
+    def __init__(self, read_func, capacity=1024, max_age=1.0):
+        
+        # Store main parameters
+        self.read_func = read_func
+        self.max_age = max_age
+        
+        # Initialize sample ring
+        self.buffer = ColumnBuffer(["time", "x", "y", "z"], capacity,
+                                   ring=True)
+        self.lock = threading.Lock()
+        
+        # Initialize thread handling variables
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.is_running = False
+        
+        # Initialize statistics
+        self.line_count = 0
+        self.garbled_count = 0
+        self.dropped_count = 0
+        self.error_count = 0
+        self.stale_count = 0
+
+    def start(self):
+        """
+        Start reading samples in a new background thread.
+        """
+        
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run,
+                                       name="field reader",
+                                       daemon=True)
+        self.is_running = True
+        self.thread.start()
+    
+    def stop(self, timeout=2.0):
+        """
+        Stop the background thread.
+        """
+        
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
+        self.is_running = False
+    
+    def run(self):
+        """
+        Reading loop run by the reader thread.
+        """
+        
+        while not self.stop_event.is_set():
+            
+            # Wait for next samples
+            try:
+                results = self.read_func()
+            except Exception as err:
+                self.error_count += 1
+                if self.error_count == 1:
+                    print("ERROR: Unable to read magnetometer | {}".format(err))
+                self.stop_event.wait(0.1)
+                continue
+            now = time.time()
+            
+            # Wait briefly if nothing has arrived yet
+            if not results:
+                self.stop_event.wait(IDLE_WAIT)
+                continue
+            
+            # Sort out lost and unreadable lines
+            samples = []
+            for result in results:
+                self.line_count += 1
+                if result is None:
+                    self.dropped_count += 1
+                elif not result[1]:
+                    self.garbled_count += 1
+                else:
+                    samples.append([now] + list(result[0]))
+            
+            # Store samples
+            if samples:
+                with self.lock:
+                    self.buffer.extend(samples)
+    
+    def latest(self, window=1):
+        """
+        Retrieve the newest field sample, or the average of the newest
+        'window' samples (or an invalid field if there are none, or the
+        newest is stale).
+        """
+        
+        with self.lock:
+            n = len(self.buffer)
+            if n == 0:
+                return list(INVALID_FIELD)
+            if time.time() - self.buffer.view(-1)[0, 0] > self.max_age:
+                self.stale_count += 1
+                return list(INVALID_FIELD)
+            samples = self.buffer.view(max(0, n - window))[1:]
+            field = samples.mean(axis=1).tolist()
+        
+        return field
+    
+    def age(self):
+        """
+        Get the time since the newest sample was read (infinite if none
+        have been).
+        """
+        
+        with self.lock:
+            if len(self.buffer) == 0:
+                return float("inf")
+            t_last = float(self.buffer.view(-1)[0, 0])
+        
+        return time.time() - t_last
+    
+    def sample_rate(self):
+        """
+        Estimate the actual sensor rate from the stored sample times.
+        """
+        
+        with self.lock:
+            time_data = np.array(self.buffer.column("time"))
+        if len(time_data) < 2 or time_data[-1] <= time_data[0]:
+            return 0.0
+        
+        return (len(time_data) - 1)/(time_data[-1] - time_data[0])
+    
+    def summary(self):
+        """
+        Summarize the samples read so far.
+        """
+        
+        return "{:.1f} Hz | {} lines, {} garbled, {} dropped, {} errors, {} " \
+               "stale reads".format(self.sample_rate(), self.line_count,
+                                    self.garbled_count, self.dropped_count,
+                                    self.error_count, self.stale_count)
@@ -15,7 +15,14 @@ import datetime
 
 from data.calibration import Calibration
 from data.data import Data
-from utilities.template import retrieve_template, check_template_values
+from hardware.acquisition import AcquisitionEngine
+from hardware.cage_simulator import CageSimulator
+from hardware.field_controller import FieldController
+from hardware.latency import LatencyRecorder
+from hardware.scheduler import RealTimeScheduler
+from utilities.template import (
+    DEFAULT_LIMITS, template_hash, compile_template
+)
 
 # Implementation specific imports (Replace with yours as needed)
 from hardware.power_supplies import (
@@ -26,13 +33,17 @@ from hardware.magnetometer import (
 )
 
 
+# Global constants
+SCHEDULE_CACHE_SIZE = 2 # schedules
+
+
 class HelmholtzCage(object):
     """
     A class object for interfacing and controlling with the overall
     Helmholtz Cage, including it's power supplies and magnetometer
     """
     
-    def __init__(self, main_dir, ps_config, mag_config):
+    def __init__(self, main_dir, ps_config, mag_config, run_config=None):
         
         # Store main directory location
         self.main_dir = main_dir
@@ -41,8 +52,14 @@ class HelmholtzCage(object):
         self.ps_config = ps_config
         self.mag_config = mag_config
         
+        # Store run configuration information
+        if run_config is None:
+            run_config = {}
+        self.run_config = run_config
+        
         # Intialize data storage/logging class
-        self.data = Data(main_dir)
+        max_points = self.run_config.get("max_points", 0)
+        self.data = Data(main_dir, max_points)
         
         # Initialize variables
         self.all_connected = False
@@ -54,18 +71,31 @@ class HelmholtzCage(object):
         self.ctrl_type = None
         self.template = None
         self.calibration = None
+        self.schedule = None
+        self.schedule_cache = {}
+        self.template_limits = self.run_config.get("template_limits",
+                                                   DEFAULT_LIMITS)
         self.x_req = 0.0
         self.y_req = 0.0
         self.z_req = 0.0
         self.iter = 0
+        self.scheduler = None
+        self.controller = None
         
         # Setup instrument interface managers
         # NOTE: replace 'elif' options with managers for your hardware
         ps_manager = self.ps_config["manager"]
         mag_manager = self.mag_config["manager"]
         
+        # Simulate the cage for any fake managers
+        if ps_manager == "fake" or mag_manager == "fake":
+            self.simulator = CageSimulator(self.run_config.get("simulator"))
+        else:
+            self.simulator = None
+        
         if ps_manager == "fake":
-            self.power_supplies = FakePowerSupplyManager(ps_config)
+            self.power_supplies = FakePowerSupplyManager(ps_config,
+                                                         self.simulator)
         elif ps_manager == "gpib":
             self.power_supplies = GPIBPowerSupplyManager(ps_config)
         #elif ps_manager == ... #ADD YOUR MANAGER HERE
@@ -76,7 +106,8 @@ class HelmholtzCage(object):
             raise NotImplementedError(msg)
         
         if mag_manager == "fake":
-            self.magnetometer = FakeMagnetometerManager(mag_config)
+            self.magnetometer = FakeMagnetometerManager(mag_config,
+                                                        self.simulator)
         elif mag_manager == "serial":
             self.magnetometer = SerialMagnetometerManager(mag_config)
         #elif mag_manager == ... #ADD YOUR MANAGER HERE
@@ -85,6 +116,16 @@ class HelmholtzCage(object):
             msg = "Magnetometer manager of type '{}' not implemented".format(
                 mag_manager)
             raise NotImplementedError(msg)
+        
+        # Setup per-operation instrument latency recording
+        self.latency = LatencyRecorder()
+        if self.run_config.get("latency_stats", True):
+            self.power_supplies.record_latency(self.latency)
+            self.magnetometer.record_latency(self.latency)
+        
+        # Setup background data acquisition
+        acq_rate = self.run_config.get("acquisition_rate", 20.0)
+        self.acquisition = AcquisitionEngine(self.sample_instruments, acq_rate)
     
     def connect_to_instruments(self):
         """ 
@@ -113,6 +154,8 @@ class HelmholtzCage(object):
         
         # Store test run type
         self.run_type = run_type
+        self.scheduler = None
+        self.controller = None
         
         # Make sure run type is actually selected
         if self.run_type is None or self.run_type == "":
@@ -142,6 +185,10 @@ class HelmholtzCage(object):
             if self.template is None:
                 is_okay = False
                 print("WARN: No template provided for dynamic run")
+            elif self.schedule is None and \
+                    (self.template["type"] == "voltage" or self.has_calibration):
+                is_okay = False
+                print("WARN: Template could not be converted to voltages")
             else:
                 self.ctrl_type = self.template["type"]
                 self.iter = 0
@@ -162,6 +209,14 @@ class HelmholtzCage(object):
         # Set flag
         if is_okay:
             self.is_running = True
+            
+            # Record instrument latencies for this run only
+            self.latency.clear()
+            
+            # Start closed-loop control for field runs, if set
+            if self.ctrl_type == "field" and \
+                    self.run_config.get("field_control") == "closed_loop":
+                self.start_field_control()
         
         # Store request type if different
         if self.data.req_type != ctrl_type:
@@ -174,8 +229,22 @@ class HelmholtzCage(object):
         Stop the Helmholtz Cage.
         """
         
-        # Set voltages on coils to zero
-        success = self.set_coil_voltages(0.0, 0.0, 0.0)
+        # Stop running through template and controlling field
+        self.stop_dynamic_run()
+        self.stop_field_control()
+        
+        # Stop sampling and keep any samples not yet stored
+        self.stop_acquisition()
+        self.store_samples()
+        
+        # Set voltages on coils to zero (skipping any commands still
+        # waiting to be sent)
+        self.power_supplies.discard_commands()
+        success = self.set_coil_voltages(0.0, 0.0, 0.0, wait=True)
+        
+        # Report instrument latencies
+        if self.latency.histograms:
+            print("Instrument latency:\n{}".format(self.latency))
         
         # Reset flags and variables
         self.is_running = False
@@ -183,41 +252,101 @@ class HelmholtzCage(object):
         
         return success
     
-    def update_data(self):
+    def start_acquisition(self):
+        """
+        Start sampling the attached sensors and devices in the
+        background (requires the data start time to be set).
+        """
+        
+        return self.acquisition.start()
+    
+    def stop_acquisition(self):
+        """
+        Stop sampling the attached sensors and devices.
+        """
+        
+        if self.acquisition.is_running:
+            self.acquisition.stop()
+    
+    def start_logging(self):
         """
-        Store all current data from attached sensors and devices.
+        Start streaming session data to storage during the run (requires
+        the data start time to be set).
+        """
+        
+        flush_interval = self.run_config.get("log_flush_interval", 1.0)
+        fsync_interval = self.run_config.get("log_fsync_interval", 10.0)
+        file_format = self.run_config.get("session_format", "csv")
+        self.data.start_logging(flush_interval, fsync_interval, file_format)
+    
+    def stop_logging(self):
+        """
+        Stop streaming session data, finalizing the session file (and
+        the step timing file, for dynamic runs).
+        """
+        
+        self.data.stop_logging()
+        
+        # Store actual vs. commanded template timing
+        if self.scheduler is not None and self.data.start_time is not None:
+            timing_file = self.data.create_file_name("csv").replace(
+                ".csv", "_timing.csv")
+            self.scheduler.write_to_file(self.data.session_dir, timing_file)
+        
+        # Store field controller timing and tracking error
+        if self.controller is not None and self.data.start_time is not None:
+            control_file = self.data.create_file_name("csv").replace(
+                ".csv", "_control.csv")
+            self.controller.write_to_file(self.data.session_dir, control_file)
+        
+        # Store instrument latencies
+        if self.latency.histograms and self.data.start_time is not None:
+            latency_file = self.data.create_file_name("csv").replace(
+                ".csv", "_latency.csv")
+            self.latency.write_to_file(self.data.session_dir, latency_file)
+    
+    def sample_instruments(self):
+        """
+        Retrieve one data point from all attached sensors and devices,
+        ordered the same as the data labels.
+        
+        NOTE: Called from the acquisition thread, so this must not touch
+              the stored data directly.
         """
         
         # Get time
         time_now = datetime.datetime.now()
         time_elapsed = float((time_now - self.data.start_time).total_seconds())
-        self.data.time.append(time_elapsed)
         
-        # Store requested values
-        self.data.x_req.append(self.x_req)
-        self.data.y_req.append(self.y_req)
-        self.data.z_req.append(self.z_req)
+        # Get requested values
+        req_data = [self.x_req, self.y_req, self.z_req]
         
         # Get power supply voltage and currents
         power_data = self.power_supplies.get_power_data()
-        self.data.Vx.append(power_data[0])
-        self.data.Vy.append(power_data[1])
-        self.data.Vz.append(power_data[2])
-        self.data.Ix.append(power_data[3])
-        self.data.Iy.append(power_data[4])
-        self.data.Iz.append(power_data[5])
         
         # Get magnetic field_data
         mag_data = self.magnetometer.get_field_strength()
-        self.data.Bx.append(mag_data[0])
-        self.data.By.append(mag_data[1])
-        self.data.Bz.append(mag_data[2])
         
-        return self.data
+        return [time_elapsed] + list(power_data) + list(mag_data) + req_data
     
-    def set_coil_voltages(self, Vx, Vy, Vz):
+    def store_samples(self):
+        """
+        Move all samples taken by the acquisition thread into the stored
+        session data.
+        """
+        
+        samples = self.acquisition.get_samples()
+        self.data.add_points(samples)
+        
+        return len(samples)
+    
+    def set_coil_voltages(self, Vx, Vy, Vz, wait=False):
         """
         Command a set of desired coil voltages for each axis.
+        
+        NOTE: If 'command_mailbox' is set in the power supply config, the
+              voltages are handed to a writer thread (with only the
+              latest command kept) unless 'wait' is set.
         """
         
         # Ensure the cage is running
@@ -225,6 +354,10 @@ class HelmholtzCage(object):
             print("ERROR: Cage is not currently running")
             success = False
         
+        # Post voltages to be sent by the writer thread
+        elif self.power_supplies.command_mailbox and not wait:
+            success = self.power_supplies.post_voltages([Vx, Vy, Vz])
+        
         # Send voltages to the cages
         else:
             success = self.power_supplies.send_voltages([Vx, Vy, Vz])
@@ -236,6 +369,12 @@ class HelmholtzCage(object):
         Command a desired magnetic field vector.
         """
         
+        # Hand field to closed-loop controller, if running
+        if self.controller is not None and self.controller.is_running:
+            self.x_req, self.y_req, self.z_req = Bx, By, Bz
+            self.controller.set_target([Bx, By, Bz])
+            return True
+        
         # Determine voltages to produce desired field
         Vx, Vy, Vz = self.calibration.get_voltage_for_desired_field(Bx, By, Bz)
         
@@ -249,50 +388,168 @@ class HelmholtzCage(object):
         Command the cage to zero out the ambient magnetic feild.
         """
         
+        # Hand zero field to closed-loop controller, if running
+        if self.controller is not None and self.controller.is_running:
+            return self.set_field_strength(0.0, 0.0, 0.0)
+        
         # Retrieve zero field voltages from calibration
-        Vx = self.calibration.x_equations["x"].zero
-        Vy = self.calibration.y_equations["y"].zero
-        Vz = self.calibration.z_equations["z"].zero
+        Vx, Vy, Vz = self.calibration.get_voltage_for_desired_field(0.0, 0.0,
+                                                                    0.0)
         
         # Command voltages to cage
         success = self.set_coil_voltages(Vx, Vy, Vz)
         
         return success
     
-    def run_once(self):
+    def run_step(self, i):
         """
-        Cycle through one command in the template file and determine 
-        the time for the next cycle to stop. Indicate the template is 
-        complete once out of points to iterate through.
+        Command the values of a single point in the template file,
+        returning whether the command was accepted.
+        
+        NOTE: The final template point only marks the end time of the
+              run, and is not commanded.
         """
-            
-        # Signal completion once out of points
-        if self.iter+1 >= len(self.template["time"]):
-            dt = -1.0
-            finished = True
         
-        # Get current iteration command values
+        # Final point, nothing to command
+        if i+1 >= len(self.schedule["time"]):
+            return True
+        
+        # Get command values
+        self.x_req, self.y_req, self.z_req = \
+            self.schedule["requests"][:, i].tolist()
+        Vx, Vy, Vz = self.schedule["voltages"][:, i].tolist()
+        
+        # Set commanded values (already converted from fields)
+        if self.controller is not None and self.controller.is_running:
+            self.controller.set_target([self.x_req, self.y_req, self.z_req],
+                                       [Vx, Vy, Vz])
+            is_okay = True
         else:
-            time = self.template["time"][self.iter]
-            dt = self.template["time"][self.iter+1] - time
-            self.x_req = self.template["x_val"][self.iter]
-            self.y_req = self.template["y_val"][self.iter]
-            self.z_req = self.template["z_val"][self.iter]
-            
-            # Set commanded values
-            if self.ctrl_type == "voltage":
-                is_okay = self.set_coil_voltages(self.x_req, self.y_req,
-                                                 self.z_req)
-            elif self.ctrl_type == "field":
-                is_okay = self.set_field_strength(self.x_req, self.y_req,
-                                                  self.z_req)
-            
-            # Set next index
-            self.iter += 1
-            
-            finished = False
+            is_okay = self.set_coil_voltages(Vx, Vy, Vz)
+        self.iter = i
+        
+        return is_okay
+    
+    def start_dynamic_run(self):
+        """
+        Start running through the template in real-time, with each point
+        commanded at its template time (measured from the run start).
+        """
+        
+        self.scheduler = RealTimeScheduler(self.schedule["time"],
+                                           self.run_step)
+        self.scheduler.start()
+    
+    def stop_dynamic_run(self):
+        """
+        Stop running through the template, and report step timing.
+        """
+        
+        if self.scheduler is not None:
+            self.scheduler.stop()
+            print("Template timing: {}".format(
+                self.scheduler.timing_summary()))
+    
+    def start_field_control(self):
+        """
+        Start holding the measured field at the commanded field with a
+        closed-loop controller, running on its own thread.
+        """
+        
+        # Limit corrected voltages to what the power supplies accept
+        limits = self.power_supplies.get_voltage_limits()
+        self.controller = FieldController(
+            self.calibration,
+            self.magnetometer.get_field_strength,
+            self.power_supplies.send_voltages,
+            rate=self.run_config.get("controller_rate", 50.0),
+            kp=self.run_config.get("controller_kp", 0.5),
+            ki=self.run_config.get("controller_ki", 2.0),
+            v_min=limits["min"],
+            v_max=limits["max"])
+        self.controller.start()
+    
+    def stop_field_control(self):
+        """
+        Stop the closed-loop field controller, and report its timing and
+        tracking error.
+        """
         
-        return dt, finished
+        if self.controller is not None and self.controller.is_running:
+            self.controller.stop()
+            print("Field control: {}".format(self.controller.summary()))
+    
+    def dynamic_run_finished(self):
+        """
+        Check if the template has been run to completion.
+        """
+        
+        return self.scheduler is not None and self.scheduler.is_finished
+    
+    def set_template(self, template):
+        """
+        Give the cage a template to run, converting it to a voltage 
+        schedule ahead of time.
+        """
+        
+        self.template = template
+        self.has_template = template is not None
+        
+        return self.compile_schedule()
+    
+    def set_calibration(self, calibration):
+        """
+        Give the cage a calibration to use, reconverting the current 
+        template with it.
+        """
+        
+        self.calibration = calibration
+        self.has_calibration = calibration is not None
+        
+        return self.compile_schedule()
+    
+    def compile_schedule(self):
+        """
+        Convert the current template into a schedule of voltages to 
+        command, reusing a recent conversion if neither the template nor
+        the calibration has changed since (only the last few schedules
+        are kept, as each may be large).
+
+        NOTE: Field templates are only converted once a calibration is
+              given.
+        """
+        
+        self.schedule = None
+        if self.template is None:
+            return True
+        
+        # Identify template and calibration
+        if self.template["type"] == "field":
+            if not self.has_calibration:
+                return True
+            calibration = self.calibration
+            key = (template_hash(self.template), calibration.get_hash())
+        else:
+            calibration = None
+            key = (template_hash(self.template), None)
+        
+        # Convert template, if not done already (checking the voltages
+        # can be commanded by the power supplies)
+        schedule = self.schedule_cache.pop(key, None)
+        if schedule is None:
+            schedule = compile_template(
+                self.template, calibration,
+                self.power_supplies.get_voltage_limits())
+            if schedule is None:
+                return False
+        
+        # Keep schedule as the most recently used, dropping the oldest
+        self.schedule_cache[key] = schedule
+        while len(self.schedule_cache) > SCHEDULE_CACHE_SIZE:
+            del self.schedule_cache[next(iter(self.schedule_cache))]
+        self.schedule = schedule
+        
+        return True
     
     def calibrate(self, calibration_dir):
         """
@@ -305,7 +562,8 @@ class HelmholtzCage(object):
         calibration_file = "calibration_{}.csv".format(start_t_str)
         
         # Initialize calibration object
-        self.calibration = Calibration(calibration_dir, calibration_file)
+        mode = self.run_config.get("calibration_mode", "diagonal")
+        self.calibration = Calibration(calibration_dir, calibration_file, mode)
         
         # Run the calibration process
         self.calibration.from_data(self.data)
@@ -11,6 +11,9 @@
 """
 
 
+import re
+
+
 MODELS = {"HP6030A": 
               {"V_limit": 200,
                "I_limit": 17,
@@ -36,6 +39,9 @@ MODELS = {"HP6030A":
                "I_limit": 10,
                "P_limit": 200}}
 
+# Precompiled response parsing helper
+VALUE_PATTERN = re.compile(r"(VOUT|IOUT)\s*([-+]?[0-9.]+(?:[Ee][-+]?[0-9]+)?)")
+
 
 class HP603xAInterface(object):
     """
@@ -54,6 +60,9 @@ class HP603xAInterface(object):
         self.v_lim = params["max_voltage"]
         self.i_lim = params["max_current"]
         
+        # Use combined voltage/current queries if requested
+        self.combined_query = params.get("combined_query", False)
+        
         # Store PyVISA interface
         self.resource = resource
         
@@ -199,6 +208,46 @@ class HP603xAInterface(object):
         
         return i_out
     
+    def get_outputs(self):
+        """
+        Get the device's measured (actual) voltage and current output, 
+        in volts and amps.
+        
+        NOTE: If 'combined_query' is set, both are queried in a single
+              bus transaction. If the query fails (e.g. times out) or
+              the response can't be parsed, the device falls back to
+              separate queries from then on.
+        """
+        
+        # Query both values in one message
+        if self.combined_query:
+            from pyvisa.errors import Error as VisaError
+            
+            try:
+                out = self.resource.query("VOUT?;IOUT?")
+                values = dict(VALUE_PATTERN.findall(out))
+                
+                # Response may be split over two messages
+                if "VOUT" in values and "IOUT" not in values:
+                    values.update(VALUE_PATTERN.findall(self.resource.read()))
+            except VisaError as err:
+                print("WARN: Combined query failed for {} | {}".format(
+                    self.name, err))
+                values = {}
+            
+            if "VOUT" in values and "IOUT" in values:
+                return float(values["VOUT"]), float(values["IOUT"])
+            
+            print("WARN: Combined query not supported for {}".format(
+                self.name))
+            self.combined_query = False
+        
+        # Otherwise, query each value separately
+        v_out = self.get_voltage_output()
+        i_out = self.get_current_output()
+        
+        return v_out, i_out
+    
     def reset(self):
         """
         Reset the device if it has been disabled by onboard processes 
@@ -259,14 +308,14 @@ class HP603xAInterface(object):
         """
         
         # Remove uneeded elements from response
-        resp = resp.replace(cmd, "")
-        resp = resp.replace("\n", "")
-        resp = resp.replace("\r", "")
-        resp = resp.replace(" ", "")
+        # NOTE: int() and float() already ignore surrounding whitespace
+        resp = resp.strip()
+        if resp.startswith(cmd):
+            resp = resp[len(cmd):]
         
         # Properly type message
         if out_type == "str":
-            resp_out = str(resp)
+            resp_out = resp.replace(" ", "")
         elif out_type == "int":
             resp_out = int(resp)
         elif out_type == "float":
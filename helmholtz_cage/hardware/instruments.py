@@ -14,37 +14,101 @@
 """
 
 
+from concurrent.futures import ThreadPoolExecutor
 import re
-import serial
+import threading
+
+from hardware.field_reader import FieldReader
+from hardware.mailbox import SetpointMailbox
+
+
+# Global constants
+POWER_SUPPLY_OPERATIONS = ["test_connection", "set_voltage", "get_outputs",
+                           "get_voltage_output", "get_current_output"]
+MAGNETOMETER_OPERATIONS = ["test_connection", "read_sensor", "read_samples"]
 
 
 class ReadLine(object):
     """
     A pyserial object wrapper for reading line.
     
+    Incoming data is kept in a single buffer with a read offset, so
+    returning a line doesn't reallocate the data behind it. Consumed
+    data is only cut from the front of the buffer once it makes up at
+    least half of it. A pending partial line longer than 'max_line' is
+    discarded (and counted in 'dropped_count').
+    
     source: https://github.com/pyserial/pyserial/issues/216
     """
     
-    def __init__(self, s):
+    def __init__(self, s, max_line=4096):
         self.buf = bytearray()
+        self.start = 0
         self.s = s
+        self.max_line = max_line
+        self.dropped_count = 0
+    
+    def fill(self):
+        """
+        Read everything waiting on the serial port into the buffer,
+        returning the number of bytes read.
+        
+        NOTE: If nothing is waiting, this waits up to the port's read
+              timeout for one byte, so it returns at once (with nothing
+              read) for a zero timeout.
+        """
+        
+        # Compact buffer once mostly consumed
+        if self.start > 0 and 2*self.start >= len(self.buf):
+            del self.buf[:self.start]
+            self.start = 0
+        
+        data = self.s.read(max(1, self.s.in_waiting))
+        self.buf += data
+        
+        return len(data)
     
     def readline(self):
-        i = self.buf.find(b"\n")
-        if i >= 0:
-            r = self.buf[:i + 1]
-            self.buf = self.buf[i + 1:]
-            return r
+        """
+        Wait for and return the next complete line.
+        """
+        
+        scanned = 0
         while True:
-            i = max(1, min(2048, self.s.in_waiting))
-            data = self.s.read(i)
-            i = data.find(b"\n")
+            i = self.buf.find(b"\n", self.start + scanned)
             if i >= 0:
-                r = self.buf + data[:i + 1]
-                self.buf[0:] = data[i + 1:]
-                return r
-            else:
-                self.buf.extend(data)
+                line = bytes(self.buf[self.start:i + 1])
+                self.start = i + 1
+                return line
+            scanned = len(self.buf) - self.start
+            self.fill()
+    
+    def readlines_available(self):
+        """
+        Read everything waiting on the serial port (see 'fill'), and
+        return all of the complete lines received in one list (without
+        line endings), which may be empty. A partial line is kept for
+        the next call.
+        """
+        
+        self.fill()
+        
+        # Split off all complete lines at once, copying them out through
+        # a view (released before the buffer can next be resized)
+        end = self.buf.rfind(b"\n", self.start)
+        if end < 0:
+            lines = []
+        else:
+            with memoryview(self.buf) as view:
+                lines = view[self.start:end].tobytes().split(b"\n")
+            self.start = end + 1
+        
+        # Discard partial line if it grows too long
+        if len(self.buf) - self.start > self.max_line:
+            self.start = len(self.buf)
+            self.dropped_count += 1
+        
+        return lines
 
 
 class PowerSupplyManager(object):
@@ -66,6 +130,19 @@ class PowerSupplyManager(object):
                         "y-axis": None,
                         "z-axis": None}
         
+        # Initialize per-device locks, so devices can be safely shared
+        # between the GUI and acquisition threads
+        self.locks = {key: threading.Lock() for key in self.devices}
+        
+        # Setup worker pool to read back each power supply concurrently
+        self.concurrent_readback = config.get("concurrent_readback", False)
+        self.pool = None
+        
+        # Setup latest-wins mailbox to send voltage commands from a
+        # writer thread, rather than waiting on each power supply
+        self.command_mailbox = config.get("command_mailbox", False)
+        self.mailbox = None
+        
         # Initialize flag variables
         self.is_connected = False
         self.connections_checked = False
@@ -83,6 +160,16 @@ class PowerSupplyManager(object):
             type(self).__name__)
         raise NotImplementedError(msg)
     
+    def record_latency(self, recorder):
+        """
+        Record the latency of each power supply operation with the given
+        latency recorder.
+        """
+        
+        for key, device in self.devices.items():
+            if device is not None:
+                recorder.wrap(device, key, POWER_SUPPLY_OPERATIONS)
+    
     def connect_to_device(self):
         """
         Attempt to connect to all system power supplies.
@@ -108,51 +195,115 @@ class PowerSupplyManager(object):
     
     def send_voltages(self, voltages):
         """
-        Send the commanded voltage values to the power supplies.
+        Send the commanded voltage values to the power supplies,
+        returning whether all of them were accepted.
         """
         
         # Convert command list to power supply dict
         cmds = self.list_to_dict(voltages)
         
-        # Attempt to set each device voltage
-        for key in self.devices.keys(): 
-            try: 
-                self.devices[key].set_voltage(cmds[key])
-                success = True
-            except ValueError:
-                print("WARN: Commanded voltage for {} higher than set limit".format(
-                    key))
-                success = False
-                # TODO: more to handle this?
-            #except Exception as err:
-            #    print("Could not send {} voltage | {}".format(key, err))
+        # Attempt to set each device voltage (even if one fails)
+        results = [self.send_device_voltage(key, cmds[key])
+                   for key in self.devices.keys()]
+        
+        return all(results)
+    
+    def send_device_voltage(self, key, voltage):
+        """
+        Send a commanded voltage value to a single power supply.
+        """
+        
+        try: 
+            with self.locks[key]:
+                self.devices[key].set_voltage(voltage)
+            success = True
+        except ValueError:
+            print("WARN: Commanded voltage for {} higher than set limit".format(
+                key))
+            success = False
+            # TODO: more to handle this?
+        #except Exception as err:
+        #    print("Could not send {} voltage | {}".format(key, err))
         
         return success
+    
+    def get_voltage_limits(self):
+        """
+        Get the voltage limits each power supply will accept (as "min"
+        and "max" lists, in volts, applied to both signs). Supplies
+        without a set limit are treated as unlimited.
+        """
+        
+        v_max = []
+        for key in self.devices.keys():
+            v_lim = getattr(self.devices[key], "v_lim", None)
+            if v_lim is None or v_lim <= 0.0:
+                v_lim = float("inf")
+            v_max.append(float(v_lim))
+        
+        return {"min": [-v for v in v_max], "max": v_max}
+    
+    def post_voltages(self, voltages):
+        """
+        Post the commanded voltage values to the command mailbox, without
+        waiting for them to be sent. Any earlier commands still waiting
+        to be sent are replaced.
         
+        NOTE: As sending happens later, this returns whether the last
+              command sent to each power supply succeeded.
+        """
+        
+        # Start writer thread on first use
+        if self.mailbox is None:
+            self.mailbox = SetpointMailbox(self.devices.keys(),
+                                           self.send_device_voltage)
+            self.mailbox.start()
+        
+        self.mailbox.post(self.list_to_dict(voltages))
+        
+        return all(self.mailbox.last_ok.values())
+    
+    def discard_commands(self):
+        """
+        Throw away any commands waiting in the command mailbox, and wait
+        for any being sent to finish.
+        """
+        
+        if self.mailbox is not None:
+            self.mailbox.discard()
+
     def get_power_data(self):
         """
         Get the actual measured voltage and current on the power 
         supplies.
+        
+        NOTE: If 'concurrent_readback' is set in the config, each power
+              supply is queried at the same time on its own worker 
+              thread, rather than one after another.
         """
         
         v_data = {}
         i_data = {}
         
-        # Attempt to retrieve each device output voltage
-        for key in self.devices.keys(): 
-            #try:
-            v = self.devices[key].get_voltage_output()
-            v_data.update({key: v})
-            #except Exception as err:
-            #    print("Could not get {} voltage | {}".format(key, err))
-        
-        # Attempt to retireve each device output current
-        for key in self.devices.keys(): 
-            #try:
-            i = self.devices[key].get_current_output()
-            i_data.update({key: i})
-            #except Exception as err:
-            #    print("Could not get {} current | {}".format(key, err))
+        # Query all power supplies at once, then wait for every result
+        if self.concurrent_readback:
+            if self.pool is None:
+                self.pool = ThreadPoolExecutor(
+                    max_workers=len(self.devices),
+                    thread_name_prefix="power supply")
+            results = {key: self.pool.submit(self.read_device_output, key)
+                       for key in self.devices.keys()}
+            results = {key: result.result() for key, result in results.items()}
+        
+        # Otherwise, query each power supply in turn
+        else:
+            results = {key: self.read_device_output(key)
+                       for key in self.devices.keys()}
+        
+        # Sort output voltages and currents
+        for key in self.devices.keys():
+            v_data.update({key: results[key][0]})
+            i_data.update({key: results[key][1]})
         
         # Package both voltage and current data into list
         v_list = self.dict_to_list(v_data)
@@ -161,6 +312,17 @@ class PowerSupplyManager(object):
         
         return data_list
     
+    def read_device_output(self, key):
+        """
+        Get the actual measured voltage and current of a single power 
+        supply.
+        """
+        
+        with self.locks[key]:
+            v, i = self.devices[key].get_outputs()
+        
+        return v, i
+    
     def handle_error(self, error_obj):
         """
         Indicate that error has occured and handle it if necessary.
@@ -177,9 +339,19 @@ class PowerSupplyManager(object):
         the power supply interface(s).
         
         NOTE: Inherited class should implement this function on an as
-              needed basis.
+              needed basis, calling this method as well.
         """
-        pass
+        
+        # Shutdown readback worker threads
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+        
+        # Stop command writer thread
+        if self.mailbox is not None:
+            self.mailbox.stop()
+            print("Voltage commands: {}".format(self.mailbox.summary()))
+            self.mailbox = None
     
     def dict_to_list(self, dict_in):
         """
@@ -223,9 +395,19 @@ class MagnetometerManager(object):
         # Intialize interface object
         self.interface = None
         
+        # Initialize lock, so the device can be safely shared between
+        # the GUI and acquisition threads
+        self.lock = threading.Lock()
+        
+        # Setup reader thread to continuously stream samples, rather
+        # than waiting for a new line on each read
+        self.background_reader = config.get("background_reader", False)
+        self.average_window = config.get("average_window", 1)
+        self.reader = None
+        
         # Initialize variables
         self.is_connected = False
-        
+    
     def configure_device(self, interface):
         """
         Placeholder method for inherited class device interface
@@ -239,26 +421,79 @@ class MagnetometerManager(object):
             type(self).__name__)
         raise NotImplementedError(msg)
     
+    def record_latency(self, recorder):
+        """
+        Record the latency of each magnetometer operation with the given
+        latency recorder.
+        
+        NOTE: Must be called before the background reader is started.
+        """
+        
+        if self.interface is not None:
+            recorder.wrap(self.interface, "magnetometer",
+                          MAGNETOMETER_OPERATIONS)
+    
     def connect_to_device(self):
         """
         Attempt to connect to the magnetometer.
         """
         
+        # Check that the reader thread is still receiving samples
+        if self.reader is not None:
+            self.is_connected = self.reader.age() < self.reader.max_age
+            return self.is_connected
+        
         # Attempt to connect to Magnetometer
         try:
             self.is_connected = self.interface.test_connection()
         except Exception as err:
             self.handle_error(err)
         
+        # Start streaming samples in the background
+        if self.is_connected and self.background_reader:
+            self.start_reader()
+        
         return self.is_connected
     
+    def start_reader(self):
+        """
+        Start reading magnetometer samples continuously on a background
+        thread.
+        """
+        
+        capacity = self.config.get("reader_capacity", 1024)
+        max_age = self.config.get("max_sample_age", 1.0)
+        self.reader = FieldReader(self.interface.read_samples, capacity,
+                                  max_age)
+        self.reader.start()
+    
+    def stop_reader(self):
+        """
+        Stop the background reader thread, reporting its statistics.
+        """
+        
+        if self.reader is not None:
+            self.reader.stop()
+            print("Magnetometer samples: {}".format(self.reader.summary()))
+            self.reader = None
+    
     def get_field_strength(self):
         """
         Read the current magnetic field values from the magnetometer.
+        
+        NOTE: If the background reader is running, this returns the 
+              newest sample (or the average of the newest 
+              'average_window' samples) without waiting. If the newest
+              sample is older than 'max_sample_age', an invalid field is
+              returned instead.
         """
         
+        if self.reader is not None:
+            return self.reader.latest(self.average_window)
+        
         #try:
-        data = self.interface.read_sensor()
+        with self.lock:
+            data = self.interface.read_sensor()
         #except Exception as err:
         #    print("Could not read field values | {}". format(err))
         
@@ -280,6 +515,8 @@ class MagnetometerManager(object):
         the magnetometer interface.
         
         Note: Inherited class should implement this function only if
-              needed.
+              needed, calling this method as well.
         """
-        pass
+        
+        # Stop reader thread
+        self.stop_reader()
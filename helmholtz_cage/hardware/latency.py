@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+
+"""
+  Latency recording for instrument operations.
+  
+  Copyright 2026 UC CubeCats
+  All rights reserved. See LICENSE file at:
+  https://github.com/uccubecats/Helmholtz-Cage/LICENSE
+  Additional copyright may be held by others, as reflected in the commit
+  history.
+"""
+
+
+import math
+import threading
+import time
+
+from utilities.files import write_to_csv
+
+
+class LatencyHistogram(object):
+    """
+    A histogram of call latencies, using logarithmically spaced bins
+    (so recording a call is just a counter increment, and percentiles
+    are accurate to within the bin width).
+    """
+    
+    def __init__(self, min_latency=1e-6, max_latency=100.0,
+                 bins_per_decade=20):
+        
+        # Store bin parameters
+        self.min_latency = min_latency
+        self.bins_per_decade = bins_per_decade
+        n_bins = int(math.ceil(math.log10(max_latency/min_latency)*
+                               bins_per_decade)) + 1
+        
+        # Initialize counts
+        self.counts = [0]*n_bins
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.lock = threading.Lock()
+    
+    def clear(self):
+        """
+        Remove all recorded latencies.
+        """
+        
+        with self.lock:
+            self.counts = [0]*len(self.counts)
+            self.count = 0
+            self.total = 0.0
+            self.max = 0.0
+    
+    def record(self, latency):
+        """
+        Add a single call latency (in seconds) to the histogram.
+        """
+        
+        if latency > self.min_latency:
+            i = int(math.log10(latency/self.min_latency)*self.bins_per_decade)
+            i = min(i, len(self.counts) - 1)
+        else:
+            i = 0
+        
+        with self.lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.total += latency
+            if latency > self.max:
+                self.max = latency
+    
+    def percentile(self, p):
+        """
+        Estimate the given percentile (0-100) of the recorded latencies,
+        as the geometric center of the bin it falls in.
+        """
+        
+        if self.count == 0:
+            return 0.0
+        
+        # Find bin containing percentile
+        target = p/100.0*self.count
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= target and count > 0:
+                break
+        
+        latency = self.min_latency*10**((i + 0.5)/self.bins_per_decade)
+        
+        return min(latency, self.max)
+    
+    def mean(self):
+        """
+        Get the mean of the recorded latencies.
+        """
+        
+        if self.count == 0:
+            return 0.0
+        
+        return self.total/self.count
+
+
+class LatencyRecorder(object):
+    """
+    An object which keeps a latency histogram for each operation of each
+    instrument device, recorded by wrapping the device's methods.
+    """
+    
+    def __init__(self):
+        
+        # Initialize histogram storage dict
+        self.histograms = {}
+    
+    def __str__(self):
+        
+        # Load tabulate on first print, keeping it out of startup
+        from tabulate import tabulate
+        
+        headers = ["device", "operation", "calls", "mean (ms)", "p50 (ms)",
+                   "p95 (ms)", "p99 (ms)", "max (ms)"]
+        
+        return tabulate(self.summary_rows(), headers=headers,
+                        floatfmt="0.3f")
+    
+    def get_histogram(self, device, operation):
+        """
+        Get the histogram for an operation of a device, creating it if
+        needed.
+        """
+        
+        key = (device, operation)
+        if key not in self.histograms:
+            self.histograms[key] = LatencyHistogram()
+        
+        return self.histograms[key]
+    
+    def wrap(self, obj, device, operations):
+        """
+        Replace the given methods of a device object with timed versions
+        (skipping any it doesn't have).
+        """
+        
+        for operation in operations:
+            method = getattr(obj, operation, None)
+            if method is None or hasattr(method, "histogram"):
+                continue
+            setattr(obj, operation, self.timed(method, device, operation))
+    
+    def timed(self, func, device, operation):
+        """
+        Create a version of a function which records the latency of each
+        call.
+        """
+        
+        histogram = self.get_histogram(device, operation)
+        record = histogram.record
+        
+        def timed_func(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(time.perf_counter() - start)
+        
+        timed_func.histogram = histogram
+        
+        return timed_func
+    
+    def clear(self):
+        """
+        Reset all histograms, keeping the wrapped methods recording.
+        """
+        
+        for histogram in self.histograms.values():
+            histogram.clear()
+    
+    def summary_rows(self):
+        """
+        Summarize each histogram (that has recorded calls) as a row of
+        device, operation, calls, then mean, p50, p95, p99 and max
+        latency in milliseconds.
+        """
+        
+        rows = []
+        for (device, operation), histogram in sorted(self.histograms.items()):
+            if histogram.count == 0:
+                continue
+            rows.append([device, operation, histogram.count,
+                         1000*histogram.mean(),
+                         1000*histogram.percentile(50),
+                         1000*histogram.percentile(95),
+                         1000*histogram.percentile(99),
+                         1000*histogram.max])
+        
+        return rows
+    
+    def write_to_file(self, file_dir, file_name):
+        """
+        Write the latency summary of each operation to a csv file.
+        """
+        
+        content = [["device", "operation", "calls", "mean", "p50", "p95",
+                    "p99", "max"],
+                   ["", "", "", "ms", "ms", "ms", "ms", "ms"]]
+        content += self.summary_rows()
+        
+        write_to_csv(file_dir, file_name, content, 'w')
@@ -13,8 +13,6 @@
 """
 
 
-import serial
-
 from hardware.instruments import MagnetometerManager
 from hardware.mlx90393 import MLX90393Interface
 from hardware.fake_magnetometer import FakeMagnetometer
@@ -46,6 +44,9 @@ class SerialMagnetometerManager(MagnetometerManager):
         timeout = self.config["timeout"]
         
         # Intialize serial port object
+        # NOTE: Imported here so PySerial is only loaded when a serial
+        #       magnetometer is actually used
+        import serial
         serial_port = serial.Serial(port,
                                     baudrate,
                                     timeout=timeout,
@@ -66,18 +67,23 @@ class SerialMagnetometerManager(MagnetometerManager):
         
     def close(self):
         
+        super().close()
         self.interface.close()
         
 
 class FakeMagnetometerManager(MagnetometerManager):
     """
     A manager object to simulate interfacing with a magnetometer.
+    
+    NOTE: Give a cage simulator (shared with the fake power supply
+          manager) to simulate the cage's response.
     """
     
-    def __init__(self, config):
+    def __init__(self, config, simulator=None):
         
         # Initialize parent class
         super().__init__(config)
         
         # Initialize fake magnetometer object
-        self.interface = FakeMagnetometer()
+        sample_rate = self.config.get("sample_rate", 100.0)
+        self.interface = FakeMagnetometer(sample_rate, simulator)
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+
+"""
+  Latest-wins command mailbox for sending set-points to instruments.
+  
+  Copyright 2026 UC CubeCats
+  All rights reserved. See LICENSE file at:
+  https://github.com/uccubecats/Helmholtz-Cage/LICENSE
+  Additional copyright may be held by others, as reflected in the commit
+  history.
+"""
+
+
+import threading
+import time
+
+
+class SetpointMailbox(object):
+    """
+    An object holding a single pending set-point per device, which a
+    writer thread sends using 'send_func(key, value)'.
+    
+    Posting a new set-point replaces any pending one that hasn't been
+    sent yet (which is counted as dropped), so the writer always sends
+    the newest command and slow writes never build up a backlog.
+    
+    A set-point is counted as failed if 'send_func' returns False or
+    raises, and the other devices' set-points are still sent.
+    """
+    
+    def __init__(self, keys, send_func):
+        
+        # Store main parameters
+        self.keys = list(keys)
+        self.send_func = send_func
+        
+        # Initialize set-point slots
+        self.slots = {key: None for key in self.keys}
+        self.post_times = {key: None for key in self.keys}
+        self.condition = threading.Condition()
+        self.is_busy = False
+        
+        # Initialize thread handling variables
+        self.thread = None
+        self.is_running = False
+        
+        # Initialize statistics
+        self.posted = {key: 0 for key in self.keys}
+        self.sent = {key: 0 for key in self.keys}
+        self.dropped = {key: 0 for key in self.keys}
+        self.failed = {key: 0 for key in self.keys}
+        self.last_ok = {key: True for key in self.keys}
+        self.max_latency = 0.0
+    
+    def start(self):
+        """
+        Start the writer thread.
+        """
+        
+        self.is_running = True
+        self.thread = threading.Thread(target=self.run,
+                                       name="command writer",
+                                       daemon=True)
+        self.thread.start()
+    
+    def stop(self, timeout=2.0):
+        """
+        Stop the writer thread (pending set-points are not sent).
+        """
+        
+        with self.condition:
+            self.is_running = False
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
+    
+    def post(self, values):
+        """
+        Post new set-points, given as a dict of values for each device.
+        """
+        
+        now = time.perf_counter()
+        with self.condition:
+            for key, value in values.items():
+                if self.slots[key] is not None:
+                    self.dropped[key] += 1
+                else:
+                    self.post_times[key] = now
+                self.slots[key] = value
+                self.posted[key] += 1
+            self.condition.notify_all()
+    
+    def discard(self):
+        """
+        Throw away all pending set-points, and wait for any set-points
+        currently being sent to finish.
+        """
+        
+        with self.condition:
+            for key in self.keys:
+                self.slots[key] = None
+            while self.is_busy:
+                self.condition.wait()
+    
+    def run(self):
+        """
+        Writing loop run by the writer thread.
+        """
+        
+        while True:
+            
+            # Wait for new set-points, then take all of them
+            with self.condition:
+                while self.is_running and \
+                        all(v is None for v in self.slots.values()):
+                    self.condition.wait()
+                if not self.is_running:
+                    break
+                pending = {key: (value, self.post_times[key])
+                           for key, value in self.slots.items()
+                           if value is not None}
+                for key in pending:
+                    self.slots[key] = None
+                self.is_busy = True
+            
+            # Send set-points, counting any rejected or failed
+            for key, (value, post_time) in pending.items():
+                try:
+                    is_okay = self.send_func(key, value) is not False
+                except Exception as err:
+                    print("ERROR: Unable to send {} set-point | {}".format(
+                        key, err))
+                    is_okay = False
+                self.last_ok[key] = is_okay
+                if is_okay:
+                    self.sent[key] += 1
+                    self.max_latency = max(self.max_latency,
+                                           time.perf_counter() - post_time)
+                else:
+                    self.failed[key] += 1
+            
+            # Signal that writer is idle
+            with self.condition:
+                self.is_busy = False
+                self.condition.notify_all()
+    
+    def summary(self):
+        """
+        Summarize the set-points posted, sent, dropped and failed so far.
+        """
+        
+        return "{} posted, {} sent, {} dropped, {} failed | max latency: " \
+               "{:.3f} ms".format(sum(self.posted.values()),
+                                  sum(self.sent.values()),
+                                  sum(self.dropped.values()),
+                                  sum(self.failed.values()),
+                                  1000*self.max_latency)
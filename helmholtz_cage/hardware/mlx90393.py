@@ -11,8 +11,48 @@
 """
 
 
+import re
+import sys
 import time
 
+from hardware.instruments import ReadLine
+
+
+# Global constants
+FIELD_PATTERN = re.compile(rb"([XYZ])[^-0-9.XYZ]*([-0-9.]*)")
+INVALID_FIELD = 999.0
+
+
+def parse_field_line(line):
+    """
+    Extract the X, Y and Z field values from a raw (bytes) line sent by
+    the magnetometer, in a single pass of a precompiled pattern. Returns
+    the values along with a flag that is False if any of them could not
+    be read (those values are set to 999.0, so not confused with 0.0).
+    """
+    
+    # Ignore anything after the end character
+    end = line.find(b"E")
+    if end >= 0:
+        line = line[:end]
+    
+    # Find the number following each axis key (keeping the first)
+    found = {}
+    for key, value in FIELD_PATTERN.findall(line):
+        found.setdefault(key, value)
+    
+    # Convert to floats
+    values = []
+    is_valid = True
+    for key in (b"X", b"Y", b"Z"):
+        try:
+            values.append(float(found[key]))
+        except (KeyError, ValueError):
+            values.append(INVALID_FIELD)
+            is_valid = False
+    
+    return tuple(values), is_valid
+
 
 class MLX90393Interface(object):
     """
@@ -27,14 +67,15 @@ class MLX90393Interface(object):
         
         # Store important char lists
         self.keys = ["X", "Y", "Z"]
-        self.valid_chars = ["0", "1", "2", "3", "4", "5",
-                            "6", "7", "8", "9", ".", "-"]
         
         # Intialize serial port object
         self.serial_port = serial_obj
+        self.line_reader = ReadLine(serial_obj)
         
         # Initialize variables
         self.is_connected = False
+        self.is_valid = False
+        self.bad_line_count = 0
     
     def test_connection(self):
         """
@@ -61,61 +102,59 @@ class MLX90393Interface(object):
         
         # Read in data
         try:
-            field_str = self.serial_port.readline().decode("utf-8")
-            x_str, y_str, z_str = "", "", ""
-            currently_reading = None
+            line = self.serial_port.readline()
             
             # Reset serial buffer to pervent it from growing too large.
             self.serial_port.reset_input_buffer()
-            
-            # If currently reading for float, add character if it's valid
-            for char in field_str:
-                if currently_reading == "X" and char in self.valid_chars:
-                    x_str += char
-                if currently_reading == "Y" and char in self.valid_chars:
-                    y_str += char
-                if currently_reading == "Z" and char in self.valid_chars:
-                    z_str += char
-                
-                # See if it's time to change what is being read
-                if char == "X":
-                    currently_reading = "X"
-                elif char == "Y":
-                    currently_reading = "Y"
-                elif char == "Z":
-                    currently_reading = "Z"
-                elif char == "E":
-                    break
-            
-            # Convert the string chunks to floats
-            try:
-                x_field = float(x_str)
-            except Exception as err:
-                x_field = 999.0
-                print("Could not determine x field from string {} | {}"
-                      .format(x_str, err))
-            try:
-                y_field = float(y_str)
-            except Exception as err:
-                y_field = 999.0
-                print("Could not determine y field from string {} | {}"
-                      .format(y_string, err))
-            try:
-                z_field = float(z_str)
-            except Exception as err:
-                z_field = 999.0
-                print("Could not determine z field from string {} | {}"
-                      .format(z_str, err))
-            
-            return (x_field, y_field, z_field)
         
         # Print 999 so that it is not confused with 0.0
         except AttributeError:
-            return (999.0, 999.0, 999.0)
-            
+            self.is_valid = False
+            self.bad_line_count += 1
+            return (INVALID_FIELD, INVALID_FIELD, INVALID_FIELD)
+        
+        # Extract field values, counting any unreadable lines
+        field, self.is_valid = parse_field_line(line)
+        if not self.is_valid:
+            self.bad_line_count += 1
+        
+        return field
+    
+    def read_samples(self):
+        """
+        Read all of the lines waiting on the serial port and extract
+        their magnetic field data, without discarding any (for use by a
+        reader continuously draining the port). Lines lost to the serial
+        buffer are returned as None.
+        """
+        
+        # Drain every complete line at once
+        dropped = self.line_reader.dropped_count
+        lines = self.line_reader.readlines_available()
+        dropped = self.line_reader.dropped_count - dropped
+        
+        return [parse_field_line(line) for line in lines] + [None]*dropped
+    
     def close(self):
         """
         Shutdown the serial port.
         """
         
         self.serial_port.close()
+
+
+if __name__ == "__main__":
+    
+    # Benchmark parser throughput on typical magnetometer lines
+    n_lines = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    lines = [b"X: -23.458  Y: 105.734  Z: -41.002  E\r\n",
+             b"X:1.5 Y:-0.25 Z:37.125 E\r\n",
+             b"X: 12.0 Y: garbled\r\n"]
+    
+    start = time.perf_counter()
+    for i in range(0, n_lines):
+        parse_field_line(lines[i % len(lines)])
+    elapsed = time.perf_counter() - start
+    
+    print("Parsed {} lines in {:.3f} s ({:.0f} lines/s)".format(
+        n_lines, elapsed, n_lines/elapsed))
@@ -13,8 +13,6 @@
 
 import os
 
-import pyvisa as visa
-
 from hardware.fake_power_supply import FakePowerSupply
 from hardware.hp603xa import HP603xAInterface
 from hardware.instruments import PowerSupplyManager
@@ -36,6 +34,9 @@ class GPIBPowerSupplyManager(PowerSupplyManager):
         super().__init__(config)
         
         # Initialize PyVISA resource manager
+        # NOTE: Imported here so PyVISA is only loaded when GPIB power
+        #       supplies are actually used
+        import pyvisa as visa
         visa_src = config["visa_path"]
         self.rm = visa.ResourceManager(visa_src)
         
@@ -95,20 +96,26 @@ class GPIBPowerSupplyManager(PowerSupplyManager):
             
         # Shutdown VISA resource manager
         self.rm.close()
+        
+        # Perform general manager cleanup
+        super().close()
 
 
 class FakePowerSupplyManager(PowerSupplyManager):
     """
     A power supply manager object to simulate controlling an array of 
     power supplies.
+    
+    NOTE: Give a cage simulator (shared with the fake magnetometer
+          manager) to simulate the cage's response.
     """
     
-    def __init__(self, config):
+    def __init__(self, config, simulator=None):
         
         # Initialize parent class
         super().__init__(config)
         
         # Setup fake power supply objects
         for key in self.devices.keys():
-            self.devices[key] = FakePowerSupply(key)
+            self.devices[key] = FakePowerSupply(key, simulator)
     
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+
+"""
+  Real-time scheduler for running Helmholtz Cage templates.
+  
+  Copyright 2026 UC CubeCats
+  All rights reserved. See LICENSE file at:
+  https://github.com/uccubecats/Helmholtz-Cage/LICENSE
+  Additional copyright may be held by others, as reflected in the commit
+  history.
+"""
+
+
+import threading
+import time
+
+import numpy as np
+
+from utilities.files import write_to_csv
+
+
+class RealTimeScheduler(object):
+    """
+    An object which calls a step function for each point of a template
+    from its own thread, at absolute deadlines measured from the start
+    of the run (so the time taken by each step never delays the next).
+    
+    The thread sleeps until shortly before each deadline, then spins for
+    the last 'spin_time' seconds to hit it precisely. The lateness of
+    each step is recorded, along with whether it failed (the step
+    function returned False or raised).
+    """
+    
+    def __init__(self, times, step_func, spin_time=0.001):
+        
+        # Store main parameters
+        self.times = times
+        self.step_func = step_func
+        self.spin_time = spin_time
+        
+        # Initialize thread handling variables
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.is_running = False
+        self.is_finished = False
+        
+        # Initialize timing records
+        self.steps_done = 0
+        self.lateness = np.zeros(len(times))
+        self.failed = np.zeros(len(times), dtype=bool)
+        self.start_time = None
+    
+    def start(self):
+        """
+        Start running through the template in a new background thread.
+        """
+        
+        self.stop_event.clear()
+        self.is_finished = False
+        self.steps_done = 0
+        self.thread = threading.Thread(target=self.run,
+                                       name="scheduler",
+                                       daemon=True)
+        self.is_running = True
+        self.thread.start()
+    
+    def stop(self, timeout=2.0):
+        """
+        Stop the background thread before the end of the template.
+        """
+        
+        self.stop_event.set()
+        if self.thread is not None and \
+                self.thread is not threading.current_thread():
+            self.thread.join(timeout)
+        self.is_running = False
+    
+    def run(self):
+        """
+        Scheduling loop run by the scheduler thread.
+        """
+        
+        self.start_time = time.perf_counter()
+        base_time = self.times[0]
+        
+        for i in range(0, len(self.times)):
+            
+            # Wait for step deadline
+            deadline = self.start_time + (self.times[i] - base_time)
+            if not self.wait_until(deadline):
+                break
+            
+            # Record lateness and run step
+            self.lateness[i] = time.perf_counter() - deadline
+            try:
+                self.failed[i] = self.step_func(i) is False
+            except Exception as err:
+                print("ERROR: Template step {} failed | {}".format(i, err))
+                self.failed[i] = True
+            self.steps_done = i + 1
+        
+        self.is_running = False
+        self.is_finished = not self.stop_event.is_set()
+    
+    def wait_until(self, deadline):
+        """
+        Wait until the given deadline, returning False if the scheduler
+        is stopped first.
+        """
+        
+        # Sleep until just before deadline
+        remaining = deadline - time.perf_counter() - self.spin_time
+        if remaining > 0.0 and self.stop_event.wait(remaining):
+            return False
+        
+        # Spin for the remaining time
+        while time.perf_counter() < deadline:
+            pass
+        
+        return not self.stop_event.is_set()
+    
+    def timing_summary(self):
+        """
+        Summarize the lateness (and failures) of the steps run so far.
+        """
+        
+        lateness = self.lateness[:self.steps_done]
+        n_failed = int(np.sum(self.failed[:self.steps_done]))
+        if len(lateness) == 0:
+            return "no template steps run"
+        
+        summary = "{} steps ({} failed) | lateness (ms) mean: {:.3f}, " \
+                  "p99: {:.3f}, max: {:.3f}".format(
+                      len(lateness), n_failed, 1000*np.mean(lateness),
+                      1000*np.percentile(lateness, 99), 1000*np.max(lateness))
+        
+        return summary
+    
+    def write_to_file(self, file_dir, file_name):
+        """
+        Write the commanded and actual time of each step run (and
+        whether it failed) to a csv file.
+        """
+        
+        n = self.steps_done
+        commanded = np.asarray(self.times[:n]) - self.times[0]
+        actual = commanded + self.lateness[:n]
+        
+        content = [["step", "commanded", "actual", "lateness", "failed"],
+                   ["", "secs", "secs", "secs", ""]]
+        content += [[i, commanded[i], actual[i], self.lateness[i],
+                     int(self.failed[i])] for i in range(0, n)]
+        
+        write_to_csv(file_dir, file_name, content, 'w')
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+
+"""
+  Headless command-line runner for the UC Helmholtz Cage.
+  
+  Connects to the instruments, loads a calibration and/or template,
+  executes a single static or dynamic run, logs the session and exits
+  with a status code, without starting the GUI (e.g. for running over
+  SSH or scripting long test campaigns).
+  
+  Usage: headless.py static --control {voltage,field} --values X Y Z
+                     [--duration SECS] [options]
+         headless.py dynamic --template FILE [--calibrate] [options]
+  
+  Copyright 2026 UC CubeCats
+  All rights reserved. See LICENSE file at:
+  https://github.com/uccubecats/Helmholtz-Cage/LICENSE
+  Additional copyright may be held by others, as reflected in the commit
+  history.
+"""
+
+
+import argparse
+import datetime
+import os
+import sys
+import time
+import traceback
+
+from data.calibration import Calibration
+from hardware.helmholtz_cage import HelmholtzCage
+from utilities.config import retrieve_configuration_info
+from utilities.resample import resample_template
+from utilities.template import retrieve_template, validate_template
+
+
+# Global constants
+UPDATE_TIME = 0.1  # secs
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_NOT_CONNECTED = 3
+EXIT_RUN_FAILED = 4
+EXIT_INTERRUPTED = 130
+
+
+class HeadlessRunner(object):
+    """
+    An object for running the Helmholtz Cage from the command line.
+    """
+    
+    def __init__(self, args):
+        
+        # Store run options
+        self.args = args
+        
+        # Get important directories
+        self.cur_path = os.path.dirname(os.path.abspath(__file__))
+        self.main_path = os.path.abspath(os.path.join(self.cur_path, os.pardir))
+        self.calibration_path = os.path.join(self.main_path, "calibrations")
+        self.template_path = os.path.join(self.main_path, "templates")
+        
+        # Retrieve system configuration information
+        configs = retrieve_configuration_info(self.cur_path)
+        ps_config = configs["power_supplies"]
+        mag_config = configs["magnetometer"]
+        run_config = configs.get("run", {})
+        
+        # Initialize Helmholtz Cage interface
+        self.cage = HelmholtzCage(self.main_path, ps_config, mag_config,
+                                  run_config)
+    
+    def find_file(self, file_name, default_dir):
+        """
+        Split a file given on the command line into its directory and
+        name, looking in the default directory if no path is given.
+        """
+        
+        if os.path.dirname(file_name) == "":
+            return default_dir, file_name
+        
+        file_path = os.path.abspath(file_name)
+        
+        return os.path.dirname(file_path), os.path.basename(file_path)
+    
+    def connect(self):
+        """
+        Connect to the instruments, returning whether all are connected.
+        """
+        
+        ps_status, mag_status = self.cage.connect_to_instruments()
+        print("Power supplies connected: {} | magnetometer connected: "
+              "{}".format(ps_status, mag_status))
+        
+        return self.cage.all_connected
+    
+    def load_calibration(self):
+        """
+        Load the calibration file given on the command line.
+        """
+        
+        file_dir, file_name = self.find_file(self.args.calibration,
+                                             self.calibration_path)
+        mode = self.cage.run_config.get("calibration_mode", "diagonal")
+        calibration = Calibration(file_dir, file_name, mode)
+        if not calibration.load_from_file():
+            print("ERROR: Unable to load calibration file '{}'".format(
+                self.args.calibration))
+            return False
+        
+        # Give calibration to the Helmholtz Cage
+        print(calibration)
+        self.cage.set_calibration(calibration)
+        self.cage.data.calibration_file = os.path.join(file_dir, file_name)
+        
+        return True
+    
+    def load_template(self):
+        """
+        Load and check the template file given on the command line.
+        """
+        
+        file_dir, file_name = self.find_file(self.args.template,
+                                             self.template_path)
+        try:
+            template = retrieve_template(file_dir, file_name)
+        except (OSError, ValueError) as err:
+            print("ERROR: Unable to read template file '{}' | {}".format(
+                self.args.template, err))
+            return False
+        
+        # Check template as read from the file
+        report = validate_template(template, self.cage.template_limits)
+        print(report)
+        
+        # Resample template to a fixed control rate, if set (checking
+        # the resampled values, as interpolation may overshoot)
+        rate = self.cage.run_config.get("template_rate", 0.0)
+        if report.is_okay and rate > 0.0:
+            method = self.cage.run_config.get("template_interpolation",
+                                              "linear")
+            try:
+                template = resample_template(template, rate, method)
+            except ValueError as err:
+                print("ERROR: Unable to resample template | {}".format(err))
+                return False
+            report = validate_template(template, self.cage.template_limits)
+            if not report.is_okay:
+                print("Resampled: {}".format(report))
+        
+        # Give template to the Helmholtz Cage
+        if not report.is_okay or not self.cage.set_template(template):
+            print("ERROR: Unable to load template file '{}'".format(
+                self.args.template))
+            return False
+        self.cage.data.template_file = os.path.join(file_dir, file_name)
+        
+        return True
+    
+    def start(self):
+        """
+        Start the run, returning whether it started.
+        """
+        
+        # Determine control type
+        if self.args.run_type == "dynamic":
+            ctrl_type = self.cage.template["type"]
+        else:
+            ctrl_type = self.args.control
+        
+        # Command the cage to start
+        if not self.cage.start_cage(self.args.run_type, ctrl_type,
+                                    self.args.calibrate):
+            return False
+        
+        # Record start time
+        self.cage.data.start_time = datetime.datetime.now()
+        
+        # Start streaming data to storage if requested
+        if self.args.log:
+            self.cage.start_logging()
+        
+        # Start sampling instruments in the background
+        self.cage.start_acquisition()
+        
+        # Start running through template or command static values
+        if self.args.run_type == "dynamic":
+            self.cage.start_dynamic_run()
+        else:
+            self.command_static_value()
+        
+        print("Session starting")
+        
+        return True
+    
+    def command_static_value(self):
+        """
+        Send the static values given on the command line to the cage.
+        """
+        
+        x, y, z = self.args.values
+        if self.args.control == "field":
+            self.cage.set_field_strength(x, y, z)
+        else:
+            self.cage.set_coil_voltages(x, y, z)
+        
+        # Store requested values
+        self.cage.x_req = x
+        self.cage.y_req = y
+        self.cage.z_req = z
+    
+    def wait_for_run(self):
+        """
+        Wait for the template to finish (or the static run duration to
+        pass), storing samples as they are taken.
+        """
+        
+        start_time = time.monotonic()
+        while True:
+            if self.args.run_type == "dynamic":
+                if self.cage.dynamic_run_finished():
+                    break
+            elif time.monotonic() - start_time >= self.args.duration:
+                break
+            
+            self.cage.store_samples()
+            time.sleep(UPDATE_TIME)
+    
+    def stop(self):
+        """
+        Stop the run, finish logging and calibrate from the data (if
+        requested), returning whether the cage stopped.
+        """
+        
+        # Command the cage to stop
+        success = self.cage.stop_cage()
+        if not success:
+            print("ERROR: Unable to command cage to stop")
+        
+        # Finish logging data if requested
+        if self.args.log:
+            self.cage.stop_logging()
+        
+        # Calibrate cage from data if specified
+        if self.args.calibrate:
+            self.cage.calibrate(self.calibration_path)
+            print(self.cage.calibration)
+            self.cage.calibration.write_to_file()
+            print("Calibration stored as '{}'".format(
+                self.cage.calibration.file_name))
+        
+        return success
+    
+    def run(self):
+        """
+        Carry out the full run, returning the exit code.
+        """
+        
+        # Connect and load run files
+        if not self.connect():
+            print("ERROR: Not all instruments are connected")
+            return EXIT_NOT_CONNECTED
+        if self.args.calibration and not self.load_calibration():
+            return EXIT_ERROR
+        if self.args.template and not self.load_template():
+            return EXIT_ERROR
+        
+        # Execute run
+        if not self.start():
+            print("Session start aborted")
+            return EXIT_RUN_FAILED
+        try:
+            self.wait_for_run()
+        except KeyboardInterrupt:
+            print("Session interrupted")
+            self.stop()
+            return EXIT_INTERRUPTED
+        if not self.stop():
+            return EXIT_RUN_FAILED
+        
+        print("Session ended successfully")
+        
+        return EXIT_OK
+
+
+def parse_arguments(argv=None):
+    """
+    Parse and check the command line arguments.
+    """
+    
+    parser = argparse.ArgumentParser(
+        description="Run the Helmholtz Cage without the GUI")
+    parser.add_argument("run_type", choices=["static", "dynamic"],
+                        help="type of test run")
+    parser.add_argument("--calibration", metavar="FILE",
+                        help="calibration file (name in 'calibrations', or "
+                             "path)")
+    parser.add_argument("--template", metavar="FILE",
+                        help="template file for dynamic runs (name in "
+                             "'templates', or path)")
+    parser.add_argument("--calibrate", action="store_true",
+                        help="calibrate the cage from this dynamic run")
+    parser.add_argument("--control", choices=["voltage", "field"],
+                        default="voltage",
+                        help="control type for static runs")
+    parser.add_argument("--values", nargs=3, type=float, default=[0.0]*3,
+                        metavar=("X", "Y", "Z"),
+                        help="static voltages (volts) or field (gauss)")
+    parser.add_argument("--duration", type=float, default=10.0,
+                        help="static run duration (secs)")
+    parser.add_argument("--no-log", dest="log", action="store_false",
+                        help="don't store the session data")
+    args = parser.parse_args(argv)
+    
+    # Check options fit the run type
+    if args.run_type == "dynamic" and args.template is None:
+        parser.error("dynamic runs require a --template")
+    if args.run_type == "static" and args.calibrate:
+        parser.error("can't calibrate from static runs")
+    
+    return args
+
+
+def main(argv=None):
+    """
+    Run the Helmholtz Cage from the command line, returning the exit
+    code.
+    """
+    
+    args = parse_arguments(argv)
+    
+    runner = None
+    try:
+        runner = HeadlessRunner(args)
+        return runner.run()
+    
+    except NotImplementedError as err:
+        print("ERROR: {}".format(err))
+        return EXIT_ERROR
+    
+    except KeyboardInterrupt:
+        print("")
+        return EXIT_INTERRUPTED
+    
+    except Exception:
+        traceback.print_exc()
+        return EXIT_ERROR
+    
+    finally:
+        if runner is not None:
+            runner.cage.shutdown()
+        print("Shutting down program")
+
+
+if __name__ == "__main__":
+    
+    sys.exit(main())
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+
+"""
+  Live data plotting for the main page of the Helmholtz Cage GUI.
+  
+  Copyright 2026 UC CubeCats
+  All rights reserved. See LICENSE file at:
+  https://github.com/uccubecats/Helmholtz-Cage/LICENSE
+  Additional copyright may be held by others, as reflected in the commit
+  history.
+"""
+
+
+import math
+
+import numpy as np
+
+from utilities.decimation import (
+    find_window_start, minmax_decimate, lttb_decimate
+)
+
+
+# Global constants
+AXES = ["x", "y", "z"]
+COLORS = ["r", "g", "b"]
+SCROLL_FRACTION = 0.1 # fraction of timespan the x-axis scrolls by
+
+
+class LivePlot(object):
+    """
+    An object which keeps a persistent set of line artists for the
+    voltage and magnetic field plots, updating them in place.
+    
+    When blitting, the lines are animated: a full canvas draw only
+    renders the static background (axes, ticks, legends), which is
+    cached and restored on each update before the lines are redrawn.
+    Axis limits are rounded outwards (and the time axis scrolls in
+    steps), so a full redraw is only needed when they actually change.
+    
+    Each line is decimated down to about the pixel width of the plots,
+    using either min/max bucketing ("minmax") or Largest-Triangle-Three-
+    Buckets ("lttb"), so drawing cost doesn't grow with sampling rate.
+    """
+    
+    def __init__(self, fig, power_axes, field_axes, timespan, use_blit=True,
+                 decimation="minmax"):
+        
+        # Store main parameters
+        self.fig = fig
+        self.power_axes = power_axes
+        self.field_axes = field_axes
+        self.timespan = timespan
+        self.use_blit = use_blit
+        self.decimation = decimation
+        
+        # Initialize variables
+        self.canvas = None
+        self.background = None
+        self.ctrl_type = None
+        self.limits = None
+        
+        # Create persistent line artists
+        self.power_lines = self.create_lines(self.power_axes, "V")
+        self.field_lines = self.create_lines(self.field_axes, "B")
+        
+        # Set up static plot formatting
+        self.format_axes()
+    
+    def create_lines(self, axes, prefix):
+        """
+        Create the measured and requested value lines for a set of axes.
+        """
+        
+        lines = {}
+        for axis, color in zip(AXES, COLORS):
+            lines[axis], = axes.plot([], [], color,
+                                     label="{}{}".format(prefix, axis),
+                                     animated=self.use_blit)
+            lines[axis + "_req"], = axes.plot(
+                [], [], color + "--",
+                label="{}{} request".format(prefix, axis),
+                animated=self.use_blit)
+        
+        return lines
+    
+    def format_axes(self):
+        """
+        Apply the static titles, labels and colors to the plots.
+        """
+        
+        self.power_axes.set_facecolor("whitesmoke")
+        self.power_axes.set_title("Voltage")
+        self.power_axes.set_ylabel("Volts")
+        self.power_axes.tick_params(labelbottom=False)
+        
+        self.field_axes.set_facecolor("whitesmoke")
+        self.field_axes.set_title("Magnetic Flux Density")
+        self.field_axes.set_xlabel("Seconds")
+        self.field_axes.set_ylabel("Gauss")
+    
+    def attach(self, canvas):
+        """
+        Attach the plot to the canvas it is drawn on.
+        """
+        
+        self.canvas = canvas
+        self.canvas.mpl_connect("draw_event", self.on_draw)
+    
+    def reset(self):
+        """
+        Remove all plotted data, forcing a full redraw on next update.
+        """
+        
+        for line in self.all_lines():
+            line.set_data([], [])
+        self.limits = None
+        self.ctrl_type = None
+    
+    def all_lines(self):
+        """
+        Retrieve a list of all line artists.
+        """
+        
+        return list(self.power_lines.values()) + list(self.field_lines.values())
+    
+    def set_ctrl_type(self, ctrl_type):
+        """
+        Show the requested values on the plot matching the control type,
+        and rebuild the legends for the visible lines.
+        """
+        
+        self.ctrl_type = ctrl_type
+        
+        # Only show request lines on the controlled value's plot
+        for axis in AXES:
+            self.power_lines[axis + "_req"].set_visible(ctrl_type == "voltage")
+            self.field_lines[axis + "_req"].set_visible(ctrl_type == "field")
+        
+        # Create plot legends
+        for axes, lines in ((self.power_axes, self.power_lines),
+                            (self.field_axes, self.field_lines)):
+            handles = [line for line in lines.values() if line.get_visible()]
+            axes.legend(handles=handles,
+                        loc='upper center',
+                        bbox_to_anchor=(0.5, 1.00),
+                        ncol=len(handles),
+                        fancybox=True,
+                        prop={'size': 7})
+    
+    def update(self, data, ctrl_type):
+        """
+        Update the lines with the data inside the plotted time span.
+        Returns whether a full redraw is needed (due to changed limits
+        or legends).
+        """
+        
+        needs_redraw = False
+        
+        # Update displayed lines if control type changed
+        if ctrl_type != self.ctrl_type:
+            self.set_ctrl_type(ctrl_type)
+            needs_redraw = True
+        
+        # Determine time axis limits, scrolling in steps
+        max_entries = len(data.time)
+        step = SCROLL_FRACTION*self.timespan
+        if max_entries > 0:
+            t_end = max(self.timespan, math.ceil(data.time[-1]/step)*step)
+        else:
+            t_end = self.timespan
+        t_start = t_end - self.timespan
+        
+        # Determine start of data within time frame
+        start_i = find_window_start(data.time, t_start)
+
+        # Retrieve data within time frame
+        time = data.time[start_i:]
+        V = [data.Vx[start_i:], data.Vy[start_i:], data.Vz[start_i:]]
+        B = [data.Bx[start_i:], data.By[start_i:], data.Bz[start_i:]]
+        req = [data.x_req[start_i:], data.y_req[start_i:], data.z_req[start_i:]]
+        
+        # Update line data (reduced to about the plot width in pixels)
+        n_points = int(self.field_axes.bbox.width)
+        for i, axis in enumerate(AXES):
+            self.power_lines[axis].set_data(
+                *self.decimate(time, V[i], n_points))
+            self.field_lines[axis].set_data(
+                *self.decimate(time, B[i], n_points))
+            req_line = self.decimate(time, req[i], n_points)
+            self.power_lines[axis + "_req"].set_data(*req_line)
+            self.field_lines[axis + "_req"].set_data(*req_line)
+        
+        # Find plot axis limits from data
+        V_min, V_max = self.find_range(V)
+        B_min, B_max = self.find_range(B)
+        req_min, req_max = self.find_range(req)
+        if ctrl_type == "voltage":
+            V_min, V_max = min(V_min, req_min), max(V_max, req_max)
+        elif ctrl_type == "field":
+            B_min, B_max = min(B_min, req_min), max(B_max, req_max)
+        
+        # Set bare minimum plot range if required, and round limits
+        limits = (t_start,
+                  t_end,
+                  round_limit(1.2*V_min, math.floor),
+                  round_limit(max(1.2*V_max, 1.0), math.ceil),
+                  round_limit(1.2*B_min, math.floor),
+                  round_limit(max(1.2*B_max, 1.0), math.ceil))
+        
+        # Only rescale if limits have actually changed
+        if limits != self.limits:
+            self.limits = limits
+            self.field_axes.set_xlim(limits[0], limits[1])
+            self.power_axes.set_ylim(limits[2], limits[3])
+            self.field_axes.set_ylim(limits[4], limits[5])
+            needs_redraw = True
+        
+        return needs_redraw
+    
+    def decimate(self, time, values, n_points):
+        """
+        Reduce a line's data to about 'n_points' points using the chosen
+        decimation method.
+        """
+        
+        if self.decimation == "minmax":
+            return minmax_decimate(time, values, n_points//2)
+        elif self.decimation == "lttb":
+            return lttb_decimate(time, values, n_points)
+        else:
+            return time, values
+    
+    def find_range(self, columns):
+        """
+        Find the minimum and maximum of a set of data columns (including
+        zero).
+        """
+        
+        col_min = 0.0
+        col_max = 0.0
+        for column in columns:
+            if len(column) > 0:
+                col_min = min(col_min, float(np.min(column)))
+                col_max = max(col_max, float(np.max(column)))
+        
+        return col_min, col_max
+    
+    def draw(self, needs_redraw):
+        """
+        Draw the plot on its canvas, only blitting the lines if no full
+        redraw is needed.
+        """
+        
+        if needs_redraw or not self.use_blit or self.background is None:
+            self.canvas.draw()
+        else:
+            self.canvas.restore_region(self.background)
+            self.draw_lines()
+            self.canvas.blit(self.fig.bbox)
+    
+    def draw_lines(self):
+        """
+        Draw the animated line artists onto the canvas.
+        """
+        
+        for axes, lines in ((self.power_axes, self.power_lines),
+                            (self.field_axes, self.field_lines)):
+            for line in lines.values():
+                if line.get_visible():
+                    axes.draw_artist(line)
+    
+    def on_draw(self, event):
+        """
+        Cache the static background after a full canvas draw, then draw
+        the lines on top of it.
+        """
+        
+        if self.use_blit:
+            self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+            self.draw_lines()
+
+
+def round_limit(value, round_func):
+    """
+    Round an axis limit to a multiple of half its order of magnitude, so
+    small changes in the data don't change the limit.
+    """
+    
+    if value == 0.0:
+        return 0.0
+    
+    step = 0.5*10**math.floor(math.log10(abs(value)))
+    
+    return round_func(value/step)*step
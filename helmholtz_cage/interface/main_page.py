@@ -17,15 +17,13 @@ import csv
 import os
 import tkinter as tk
 
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
+from interface.live_plot import LivePlot
 
 
 # Global constants
 MAX_FIELD = 1.5 # Gauss
 MAX_VOLTAGE = 18 # Volts
 PLOT_TIMESPAN = 30 # secs
-UPDATE_PLOT_TIME = 1  # secs
 UPDATE_LOG_TIME = 5  # secs
 UPDATE_CALIBRATE_TIME = 5  # secs
 LARGE_FONT = ("Verdana", 12)
@@ -123,7 +121,10 @@ class MainPage(tk.Frame):
         self.fill_dynamic_frame()
         self.fill_run_frame()
         self.fill_others_frame()
-        self.fill_plot_frame()
+        
+        # Create the plots once the window is up, as matplotlib is slow
+        # to load
+        self.after_idle(self.fill_plot_frame)
     
     def fill_connect_frame(self):
         """
@@ -541,29 +542,37 @@ class MainPage(tk.Frame):
         """
         
         # Create figure and initialize plots
+        # NOTE: matplotlib is imported here, so it is only loaded once
+        #       the plots are first needed
         if not self.controller.cage.data.plots_created:
-            self.fig, (self.power_supplies_plot, self.mag_field_plot) = \
-                plt.subplots(nrows=2, facecolor='lightgray')
-            self.power_supplies_plot = plt.subplot(211)
-            self.mag_field_plot = plt.subplot(212)
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+            from matplotlib.figure import Figure
+            self.fig = Figure(facecolor='lightgray')
+            self.power_supplies_plot, self.mag_field_plot = \
+                self.fig.subplots(nrows=2, sharex=True)
+            self.live_plot = LivePlot(self.fig,
+                                      self.power_supplies_plot,
+                                      self.mag_field_plot,
+                                      PLOT_TIMESPAN)
         
         # Separated for easy recreation for new plots after hitting stop
-        self.update_plot_info(self.controller.cage.data)
+        needs_redraw = self.update_plot_info(self.controller.cage.data)
         
         # Add to frame
         if not self.controller.cage.data.plots_created:
             self.canvas = FigureCanvasTkAgg(self.fig, self.plots_frame)
-            self.canvas.draw()
+            self.live_plot.attach(self.canvas)
             self.canvas.get_tk_widget().pack(side=tk.BOTTOM,
                                              fill=tk.BOTH,
                                              expand=True)
+            needs_redraw = True
         
         # Set flag variable
         self.controller.cage.data.plots_created = True
         
-        # Draw plots on subframe
-        self.canvas.draw()
-    
+        # Draw plots on subframe (only blitting lines when possible)
+        self.live_plot.draw(needs_redraw)
+
     def update_connection_entries(self, ps_status, mag_status):
         """
         Update the connection frame status entries for each connected 
@@ -603,140 +612,14 @@ class MainPage(tk.Frame):
     def update_plot_info(self, data):
         """
         Update the data subplots, within data displayed limited to the 
-        'PLOT_TIMESPAN' from the current time.
+        'PLOT_TIMESPAN' from the current time. Returns whether the whole
+        figure needs to be redrawn.
         """
         
-        # Clear both plots in plot frame
-        self.power_supplies_plot.cla()
-        self.mag_field_plot.cla()
-
-        # Get/Set some basic parameters
         field_or_voltage = self.ctrl_type.get()
-        max_entries = len(data.time)
-        power_legend_ncol = 3
-        mag_legend_ncol = 3
-        
-        # If not enough data collected yet, plot fake zero values
-        if max_entries <= 1:
-            time = [0]
-            Vx = [0]
-            Vy = [0]
-            Vz = [0]
-            x_req = [0]
-            y_req = [0]
-            z_req = [0]
-            Bx = [0]
-            By = [0]
-            Bz = [0]
-        
-        # Determine updated start time for plot
-        else: 
-            plot_start = data.time[-1] - PLOT_TIMESPAN
-            if plot_start <= 0.0:
-                plot_start = 0.0
-            start_i = max_entries - 1
-            for i in range(0,max_entries):
-                start_i -= 1
-                if data.time[start_i] <= plot_start or start_i == 0:
-                    break
-        
-            # Retrieve data within time frame
-            time = data.time[start_i: max_entries] 
-            Vx = data.Vx[start_i: max_entries]
-            Vy = data.Vy[start_i: max_entries]
-            Vz = data.Vz[start_i: max_entries]
-            x_req = data.x_req[start_i: max_entries]
-            y_req = data.y_req[start_i: max_entries]
-            z_req = data.z_req[start_i: max_entries]
-            Bx = data.Bx[start_i: max_entries]
-            By = data.By[start_i: max_entries]
-            Bz = data.Bz[start_i: max_entries]
-        
-        # Find maximum and minimum values for each data set
-        V_max = max(Vx + Vy + Vz + [0.0])
-        V_min = min(Vx + Vy + Vz + [0.0])
-        req_max = max(x_req + y_req + z_req + [0.0])
-        req_min = min(x_req + y_req + z_req + [0.0])
-        B_max = max(Bx + By + Bz + [0.0])
-        B_min = min(Bx + By + Bz + [0.0])
-        
-        # Find plot axis limits from data
-        if field_or_voltage == "voltage":
-            max_y_plot_one = 1.2*max(V_max, req_max)
-            min_y_plot_one = 1.2*min(V_min, req_min)
-            max_y_plot_two = 1.2*B_max
-            min_y_plot_two = 1.2*B_min
-        elif field_or_voltage == "field":
-            max_y_plot_one = 1.2*V_max
-            min_y_plot_one = 1.2*V_min
-            max_y_plot_two = 1.2*max(B_max, req_max)
-            min_y_plot_two = 1.2*min(B_min, req_min)
-        else:
-            max_y_plot_one = 1.2*V_max
-            min_y_plot_one = 1.2*V_min
-            max_y_plot_two = 1.2*B_max
-            min_y_plot_two = 1.2*B_min
-        
-        # Set bare minimum plot range if required
-        if max_y_plot_one < 1.0:
-            max_y_plot_one = 1.0
-        if max_y_plot_two < 1.0:
-            max_y_plot_two = 1.0
-        
-        # Plot power supply voltage graph
-        self.power_supplies_plot.plot(time, Vx, 'r', label="Vx")
-        self.power_supplies_plot.plot(time, Vy, 'g', label="Vy")
-        self.power_supplies_plot.plot(time, Vz, 'b', label="Vz")
-        if field_or_voltage == "voltage":
-            self.power_supplies_plot.plot(time, x_req, 'r--', label="Vx request")
-            self.power_supplies_plot.plot(time, y_req, 'g--', label="Vy request")
-            self.power_supplies_plot.plot(time, z_req, 'b--', label="Vz request")
-            power_legend_ncol = 6
-            mag_legend_ncol = 3
-        
-        self.plot_1_axes = self.power_supplies_plot.axes
-        self.plot_1_axes.set_ylim(min_y_plot_one, max_y_plot_one)
-        
-        # Plot magnetic field graph
-        self.mag_field_plot.plot(time, Bx, 'r', label="Bx")
-        self.mag_field_plot.plot(time, By, 'g', label="By")
-        self.mag_field_plot.plot(time, Bz, 'b', label="Bz")
-        if field_or_voltage == "field":
-            self.mag_field_plot.plot(time, x_req, 'r--', label="Bx request")
-            self.mag_field_plot.plot(time, y_req, 'g--', label="By request")
-            self.mag_field_plot.plot(time, z_req, 'b--', label="Bz request")
-            power_legend_ncol = 3
-            mag_legend_ncol = 6
-        
-        self.plot_2_axes = self.mag_field_plot.axes
-        self.plot_2_axes.set_ylim(min_y_plot_two, max_y_plot_two)
-        
-        # Combine plots for GUI display
-        self.power_supplies_plot.get_shared_x_axes().join(
-            self.power_supplies_plot, self.mag_field_plot)
-        self.power_supplies_plot.set_xticklabels([])
-        
-        self.power_supplies_plot.set_facecolor("whitesmoke")
-        self.power_supplies_plot.set_title("Voltage")
-        self.power_supplies_plot.set_ylabel("Volts")
-        
-        self.mag_field_plot.set_facecolor("whitesmoke")
-        self.mag_field_plot.set_title("Magnetic Flux Density")
-        self.mag_field_plot.set_xlabel("Seconds")
-        self.mag_field_plot.set_ylabel("Gauss")
-        
-        # Create plot legends
-        self.power_supplies_plot.legend(loc='upper center',
-                                        bbox_to_anchor=(0.5, 1.00),
-                                        ncol=power_legend_ncol,
-                                        fancybox=True,
-                                        prop={'size': 7})
-        self.mag_field_plot.legend(loc='upper center',
-                                   bbox_to_anchor=(0.5, 1.0),
-                                   ncol=mag_legend_ncol,
-                                   fancybox=True,
-                                   prop={'size': 7})
         
+        return self.live_plot.update(data, field_or_voltage)
+    
     def clear_plot_frame(self):
         """
         When stopping the current run, clear the plot frame and reset it
@@ -744,12 +627,11 @@ class MainPage(tk.Frame):
         """
         
         # Clear both plots in plot frame
-        self.power_supplies_plot.clear()
-        self.mag_field_plot.clear()
+        self.live_plot.reset()
         
         # Recreate titles and axis information
         self.fill_plot_frame()
-    
+
     def start_cage_update_buttons(self):
         """
         Update the status of buttons after the cage has started.
@@ -0,0 +1,95 @@
+"""
+Functions for reducing time series data to a displayable size.
+
+Copyright 2026 UC CubeCats
+All rights reserved. See LICENSE file at:
+https://github.com/uccubecats/Helmholtz-Cage/LICENSE
+Additional copyright may be held by others, as reflected in the commit
+history.
+"""
+
+
+import numpy as np
+
+
+def find_window_start(time, t_start):
+    """
+    Find the index of the last point at or before the given start time
+    (or the first point, if none are), using a binary search over the
+    ascending time values.
+    """
+    
+    i = int(np.searchsorted(time, t_start, side="right")) - 1
+    
+    return max(i, 0)
+
+def minmax_decimate(time, values, n_buckets):
+    """
+    Reduce a series to the minimum and maximum point of each of the
+    'n_buckets' equally sized buckets, keeping peaks visible. Points are
+    returned in their original order.
+    """
+    
+    n = len(time)
+    
+    # No need to decimate short series
+    if n_buckets < 1 or n <= 2*n_buckets:
+        return time, values
+    
+    # Find min/max position within each full bucket
+    size = n//n_buckets
+    used = size*n_buckets
+    buckets = np.asarray(values[:used]).reshape(n_buckets, size)
+    offsets = np.arange(0, used, size)
+    i_min = offsets + np.argmin(buckets, axis=1)
+    i_max = offsets + np.argmax(buckets, axis=1)
+    
+    # Keep the points in the order they occured, plus any leftovers
+    indices = np.sort(np.concatenate((i_min, i_max)))
+    if used < n:
+        indices = np.concatenate((indices, np.arange(used, n)))
+    
+    return time[indices], values[indices]
+
+def lttb_decimate(time, values, n_out):
+    """
+    Reduce a series to 'n_out' points using the Largest-Triangle-Three-
+    Buckets algorithm, which keeps the points which contribute the most
+    to the visual shape of the series.
+    """
+    
+    n = len(time)
+    
+    # No need to decimate short series
+    if n_out < 3 or n <= n_out:
+        return time, values
+    
+    time = np.asarray(time)
+    values = np.asarray(values)
+    
+    # Bucket edges (first and last points are always kept)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    indices = np.empty(n_out, dtype=int)
+    indices[0] = 0
+    indices[-1] = n - 1
+    
+    a = 0
+    for i in range(0, n_out - 2):
+        
+        # Average of next bucket (or the last point)
+        if i + 2 < n_out - 1:
+            t_next = time[edges[i + 1]:edges[i + 2]].mean()
+            v_next = values[edges[i + 1]:edges[i + 2]].mean()
+        else:
+            t_next = time[-1]
+            v_next = values[-1]
+        
+        # Pick the point in this bucket making the largest triangle
+        t = time[edges[i]:edges[i + 1]]
+        v = values[edges[i]:edges[i + 1]]
+        area = np.abs((time[a] - t_next)*(v - values[a])
+                      - (time[a] - t)*(v_next - values[a]))
+        a = edges[i] + int(np.argmax(area))
+        indices[i + 1] = a
+    
+    return time[indices], values[indices]
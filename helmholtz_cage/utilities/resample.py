@@ -0,0 +1,126 @@
+"""
+Functions for resampling templates to a fixed control rate.
+
+Copyright 2026 UC CubeCats
+All rights reserved. See LICENSE file at:
+https://github.com/uccubecats/Helmholtz-Cage/LICENSE
+Additional copyright may be held by others, as reflected in the commit
+history.
+"""
+
+
+import hashlib
+
+import numpy as np
+
+
+# Global constants
+METHODS = ["zoh", "linear", "cubic"]
+CHUNK_ROWS = 65536
+
+
+def resample_times(time, rate):
+    """
+    Create evenly spaced times at the given rate (Hz) covering the same
+    span as the given times, always ending at the final time.
+    
+    NOTE: The given times must be finite and strictly ascending, with
+          at least two points.
+    """
+    
+    # Check times can be resampled
+    if len(time) < 2:
+        raise ValueError("at least two time points are needed to resample")
+    if not np.isfinite(time).all() or not (np.diff(time) > 0.0).all():
+        raise ValueError("time values must be finite and strictly ascending")
+    
+    n_steps = int(np.floor((time[-1] - time[0])*rate + 1e-9))
+    new_time = time[0] + np.arange(0, n_steps + 1)/rate
+    if new_time[-1] < time[-1]:
+        new_time = np.append(new_time, time[-1])
+    
+    return new_time
+
+def iter_resampled_chunks(time, values, new_time, method="linear",
+                          chunk_rows=CHUNK_ROWS):
+    """
+    Interpolate values (shape (3, points)) given at 'time' onto
+    'new_time', yielding the result a chunk of 'chunk_rows' points at a
+    time as (start index, values chunk) pairs.
+    
+    Methods are "zoh" (hold each value until the next point), "linear",
+    and "cubic" (a natural cubic spline, which requires scipy).
+    """
+    
+    time = np.asarray(time, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    
+    # Fit cubic spline through all points once
+    if method == "cubic":
+        from scipy.interpolate import CubicSpline
+        spline = CubicSpline(time, values, axis=1, bc_type="natural")
+    elif method not in METHODS:
+        msg = "'{}' interpolation method not found".format(method)
+        raise NotImplementedError(msg)
+    
+    for start in range(0, len(new_time), chunk_rows):
+        chunk_time = new_time[start:start + chunk_rows]
+        
+        # Hold the last value at or before each time
+        if method == "zoh":
+            i = np.searchsorted(time, chunk_time, side="right") - 1
+            chunk = values[:, np.clip(i, 0, len(time) - 1)]
+        
+        # Interpolate between neighbouring points
+        elif method == "linear":
+            chunk = np.array([np.interp(chunk_time, time, axis_values)
+                              for axis_values in values])
+        
+        # Evaluate spline
+        else:
+            chunk = spline(chunk_time)
+        
+        yield start, chunk
+
+def resample_template(template, rate, method="linear"):
+    """
+    Resample a template (as given by 'retrieve_template') to evenly
+    spaced points at the given rate (Hz), so sparse waypoint templates
+    can be run smoothly at a fixed control rate. Returns a new template
+    dict.
+    """
+    
+    time = np.asarray(template["time"], dtype=np.float64)
+    if "values" in template:
+        values = template["values"]
+    else:
+        values = np.array([template["x_val"],
+                           template["y_val"],
+                           template["z_val"]], dtype=np.float64)
+    
+    # Fill resampled values a chunk at a time
+    new_time = resample_times(time, rate)
+    new_values = np.empty((3, len(new_time)))
+    for start, chunk in iter_resampled_chunks(time, values, new_time,
+                                              method):
+        new_values[:, start:start + chunk.shape[1]] = chunk
+    
+    # Identify resampled template from the original
+    digest = hashlib.sha1("{}:{}:{}".format(template.get("hash", ""), rate,
+                                            method).encode("utf-8"))
+    if "hash" not in template:
+        digest.update(time.tobytes())
+        digest.update(np.ascontiguousarray(values).tobytes())
+    
+    # Store values in dict
+    resampled = {
+        "time": new_time,
+        "type": template["type"],
+        "x_val": new_values[0],
+        "y_val": new_values[1],
+        "z_val": new_values[2],
+        "values": new_values,
+        "hash": digest.hexdigest()
+    }
+    
+    return resampled
@@ -9,100 +9,393 @@ history.
 """
 
 
+import csv
+import hashlib
+import itertools
+import json
 import os
 
-from utilities.files import read_from_csv
+import numpy as np
 
 
-def retrieve_template(file_dir, file_name):
+# Global constants
+CACHE_DIR = ".cache"
+CHUNK_ROWS = 65536
+DEFAULT_LIMITS = {
+    "field": {"min": [-5.0, -5.0, -5.0], "max": [5.0, 5.0, 5.0]},
+    "voltage": {"min": [-1.5, -1.5, -1.5], "max": [1.5, 1.5, 1.5]}
+}
+
+
+class TemplateReport(object):
     """
-    Convert data from a template file into a dict.
+    An object holding the results of validating a template, including
+    the number of each kind of problem found and descriptions of the
+    first 'max_examples' offending rows.
     """
+    
+    def __init__(self, max_examples=10):
+        
+        # Store main parameters
+        self.max_examples = max_examples
+        
+        # Initialize results
+        self.is_okay = True
+        self.n_rows = 0
+        self.counts = {}
+        self.examples = []
+    
+    def __str__(self):
+        
+        if self.is_okay:
+            return "Template okay ({} rows)".format(self.n_rows)
+        
+        lines = ["Template has problems ({} rows):".format(self.n_rows)]
+        for problem, count in self.counts.items():
+            lines.append("  {}: {}".format(problem, count))
+        if self.examples:
+            lines.append("First offending rows:")
+        for row, description in self.examples:
+            lines.append("  row {}: {}".format(row, description))
+        
+        return "\n".join(lines)
+    
+    def add_problem(self, problem, rows=(), descriptions=()):
+        """
+        Record a problem found in the given rows.
+        """
+        
+        self.is_okay = False
+        self.counts[problem] = self.counts.get(problem, 0) + max(1, len(rows))
+        
+        # Keep descriptions of the first few rows
+        for row, description in zip(rows, descriptions):
+            if len(self.examples) >= self.max_examples:
+                break
+            self.examples.append((int(row), description))
 
-    time = []
-    x_val = []
-    y_val = []
-    z_val = []
 
-    # Read in data from csv data
-    content = read_from_csv(file_dir, file_name)
+def retrieve_template(file_dir, file_name, use_cache=True):
+    """
+    Convert data from a template file into a dict of arrays.
+    
+    The template values are parsed once into a binary cache file (in a
+    '.cache' folder beside the template), stored column by column. On
+    later loads this is memory-mapped, so only the parts of a template
+    actually used are read into memory. The cache is rebuilt if the
+    template file changes.
+    """
+    
+    file_path = os.path.join(file_dir, file_name)
+    stat = os.stat(file_path)
+    source = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    
+    # Identify template by its file, rather than hashing its contents
+    key = "{}:{}:{}".format(os.path.abspath(file_path), stat.st_size,
+                            stat.st_mtime_ns)
+    file_hash = hashlib.sha1(key.encode("utf-8")).hexdigest()
+    
+    # Load cached values, (re)building the cache if needed
+    data = None
+    if use_cache:
+        try:
+            data, field_or_voltage = load_template_cache(file_dir, file_name,
+                                                         source)
+            if data is None:
+                data, field_or_voltage = build_template_cache(
+                    file_dir, file_name, source)
+        except OSError as err:
+            print("WARN: Unable to cache template | {}".format(err))
+            data = None
+    
+    # Otherwise, parse the template into memory
+    if data is None:
+        data = np.empty((4, count_template_rows(file_path)))
+        field_or_voltage, n_rows = parse_template_csv(file_path, data)
+        data = data[:, :n_rows]
     
-    # Parse data into lists
-    i = 0
-    for row in content:
-        if i==0:
-            pass
-        else:
-            if i==1:
-                field_or_voltage = str(row[0])
-            time.append(float(row[1]))
-            x_val.append(float(row[2]))
-            y_val.append(float(row[3]))
-            z_val.append(float(row[4]))
-            
-        i += 1
-
     # Store values in dict
     template = {
-        "time": time,
+        "time": data[0],
         "type": field_or_voltage,
-        "x_val": x_val,
-        "y_val": y_val,
-        "z_val": z_val
+        "x_val": data[1],
+        "y_val": data[2],
+        "z_val": data[3],
+        "values": data[1:4],
+        "hash": file_hash
     }
     
     return template
-    
-def check_template_values(temp_data, limits):
+
+def count_template_rows(file_path):
     """
-    Check the values from a template file to ensure they are outside
-    the systems limits.
+    Count the number of data rows in a template file (one per line,
+    after the header line).
     """
     
-    is_okay = True
+    n_lines = 0
+    last = b"\n"
+    with open(file_path, 'rb') as template_file:
+        for block in iter(lambda: template_file.read(1 << 20), b""):
+            n_lines += block.count(b"\n")
+            last = block[-1:]
+    if last != b"\n":
+        n_lines += 1
+    
+    return max(n_lines - 1, 0)
+
+def parse_template_csv(file_path, out):
+    """
+    Stream the rows of a template file into an array of shape (4, rows)
+    (time, x, y and z values), a chunk of rows at a time. Returns the 
+    template type and the number of rows read.
+    """
     
-    # Get data lists out of dict
-    time = temp_data["time"]
-    x_val = temp_data["x_val"]
-    y_val = temp_data["y_val"]
-    z_val = temp_data["z_val"]
+    field_or_voltage = None
+    n_rows = 0
     
-    # Check values in lists
-    if len(time) == len(x_val) == len(y_val) == len(z_val):
-        
-        # Check run type
-        if temp_data["type"] == "field":
-            max_val = limits[0]
-        elif temp_data["type"] == "voltage":
-            max_val = limits[1]
-        else:
-            is_okay = False
-            print("ERROR: Run type is not 'field' or 'voltage'.")
-            return is_okay
+    with open(file_path, 'r', newline='') as csv_file:
+        next(csv_file, None)
         
-        for i in range(0, len(time)):
+        while True:
             
-            # Check that time values are ordered
-            if not time[i] > time[i-1] and not i==0:
-                is_okay = False
-                print("ERROR: Time values are not in ascending order.")
+            # Read next chunk of lines
+            lines = list(itertools.islice(csv_file, CHUNK_ROWS))
+            if not lines:
                 break
-                
-            # Check that the values are below system limits
-            if (x_val[i] > max_val):
-                print("ERROR: {} is above limit".format(x_val[i]))
-                print("Check: 'X' value in row {}".format(i))
-                is_okay = False
-            if (y_val[i] > max_val):
-                print("ERROR: {} is above limit".format(y_val[i]))
-                print("Check: 'Y' value in row {}".format(i))
-                is_okay = False
-            if (z_val[i] > max_val):
-                print("ERROR: {} is above limit".format(z_val[i]))
-                print("Check 'Z' value in row {}".format(i))
-                is_okay = False
+            
+            # Template type is only given in the first row
+            if field_or_voltage is None:
+                first_row = next(csv.reader(lines[:1]))
+                field_or_voltage = str(first_row[0])
+            
+            # Convert the whole chunk at once
+            values = np.loadtxt(lines, delimiter=",", usecols=(1, 2, 3, 4),
+                                ndmin=2)
+            out[:, n_rows:n_rows + len(values)] = values.T
+            n_rows += len(values)
+    
+    return field_or_voltage, n_rows
+
+def get_template_cache_paths(file_dir, file_name):
+    """
+    Get the paths of a template's cached values and cache information.
+    """
+    
+    cache_dir = os.path.join(file_dir, CACHE_DIR)
+    data_path = os.path.join(cache_dir, file_name + ".npy")
+    info_path = os.path.join(cache_dir, file_name + ".json")
+    
+    return data_path, info_path
+
+def load_template_cache(file_dir, file_name, source):
+    """
+    Memory-map a template's cached values, if they exist and were made
+    from the current template file. Returns the values and template 
+    type (or None for both).
+    """
+    
+    data_path, info_path = get_template_cache_paths(file_dir, file_name)
+    if not os.path.exists(data_path) or not os.path.exists(info_path):
+        return None, None
+    
+    # Check cache matches template file
+    with open(info_path, 'r') as info_file:
+        info = json.load(info_file)
+    if info.get("source") != source:
+        return None, None
+    
+    data = np.load(data_path, mmap_mode='r')
+    
+    return data[:, :info["rows"]], info["type"]
+
+def build_template_cache(file_dir, file_name, source):
+    """
+    Parse a template file straight into a memory-mapped cache file, and
+    record where it came from. Returns the values and template type.
+    """
+    
+    file_path = os.path.join(file_dir, file_name)
+    data_path, info_path = get_template_cache_paths(file_dir, file_name)
+    os.makedirs(os.path.dirname(data_path), exist_ok=True)
+    
+    # Parse template into a temporary cache file
+    n_lines = count_template_rows(file_path)
+    data = np.lib.format.open_memmap(data_path + ".tmp", mode='w+',
+                                     dtype=np.float64, shape=(4, n_lines))
+    field_or_voltage, n_rows = parse_template_csv(file_path, data)
+    data.flush()
+    del data
+    
+    # Write cache information, then put cache files in place
+    info = {"source": source, "type": field_or_voltage, "rows": n_rows}
+    with open(info_path + ".tmp", 'w') as info_file:
+        json.dump(info, info_file)
+    os.replace(data_path + ".tmp", data_path)
+    os.replace(info_path + ".tmp", info_path)
+    
+    return load_template_cache(file_dir, file_name, source)
+    
+def find_bad_values(values, lower, upper):
+    """
+    Find values (an array of shape (3, points)) which are not finite or
+    are outside the per-axis lower and upper limits.
+    """
+    
+    lower = np.asarray(lower, dtype=np.float64)[:, None]
+    upper = np.asarray(upper, dtype=np.float64)[:, None]
+    
+    return ~np.isfinite(values) | (values < lower) | (values > upper)
+
+def validate_template(template, limits=None, max_examples=10):
+    """
+    Check a template for ascending, finite time values and for finite
+    values within the per-axis limits of its type (checking a chunk of
+    rows at a time with array operations). Returns a TemplateReport.
+    """
+    
+    if limits is None:
+        limits = DEFAULT_LIMITS
+    report = TemplateReport(max_examples)
+    
+    # Check run type
+    if template["type"] not in limits:
+        report.add_problem("run type is not 'field' or 'voltage'")
+        return report
+    lower = limits[template["type"]]["min"]
+    upper = limits[template["type"]]["max"]
+    
+    # Check all axes have the same number of values
+    time = np.asarray(template["time"], dtype=np.float64)
+    values = [np.asarray(template[key], dtype=np.float64)
+              for key in ["x_val", "y_val", "z_val"]]
+    report.n_rows = len(time)
+    if not all(len(axis_values) == len(time) for axis_values in values):
+        report.add_problem("unequal axis lengths")
+        return report
+    
+    prev_time = -np.inf
+    for start in range(0, len(time), CHUNK_ROWS):
+        end = start + CHUNK_ROWS
+        
+        # Check that time values are finite and ordered
+        chunk_time = time[start:end]
+        steps = np.diff(chunk_time, prepend=prev_time)
+        is_bad = ~np.isfinite(chunk_time) | ~(steps > 0.0)
+        if is_bad.any():
+            rows = start + np.flatnonzero(is_bad)
+            report.add_problem("time not ascending", rows,
+                               ["time {} after {}".format(
+                                   time[i], time[i - 1] if i > 0 else None)
+                                for i in rows[:max_examples]])
+        prev_time = chunk_time[-1]
+        
+        # Check that the values are finite and within system limits
+        chunk = np.array([axis_values[start:end] for axis_values in values])
+        is_bad = find_bad_values(chunk, lower, upper)
+        if is_bad.any():
+            axes, rows = np.nonzero(is_bad)
+            order = np.argsort(rows, kind="stable")
+            axes = axes[order]
+            rows = rows[order]
+            report.add_problem("value beyond limits", start + rows,
+                               ["{} value {} outside [{}, {}]".format(
+                                   "XYZ"[a], chunk[a, i], lower[a], upper[a])
+                                for a, i in zip(axes[:max_examples],
+                                                rows[:max_examples])])
+    
+    return report
+
+def check_template_values(temp_data, limits):
+    """
+    Check the values from a template file to ensure they are within
+    the systems limits, printing any problems found.
+    
+    NOTE: 'limits' may be given as the maximum [field, voltage] values,
+          which are applied to both signs.
+    """
+    
+    # Convert maximum values to per-axis limits
+    if not isinstance(limits, dict):
+        limits = {"field": {"min": [-limits[0]]*3, "max": [limits[0]]*3},
+                  "voltage": {"min": [-limits[1]]*3, "max": [limits[1]]*3}}
+    
+    report = validate_template(temp_data, limits)
+    if not report.is_okay:
+        print("ERROR: {}".format(report))
+    
+    return report.is_okay
+
+def template_hash(template):
+    """
+    Create a hash identifying the contents of a template (or use the
+    one given when it was loaded).
+    """
+    
+    if "hash" in template:
+        return template["hash"]
+    
+    digest = hashlib.sha1(template["type"].encode("utf-8"))
+    for key in ["time", "x_val", "y_val", "z_val"]:
+        digest.update(np.asarray(template[key], dtype=np.float64).tobytes())
+    
+    return digest.hexdigest()
+    
+def compile_template(template, calibration=None, voltage_limits=None):
+    """
+    Convert a template into a schedule of NumPy arrays, holding the 
+    requested values and the coil voltages to command at each point 
+    (solved using the calibration, for field templates), with shape 
+    (3, points). Returns None if any voltage can't be commanded (given 
+    the "min" and "max" voltage limits of each axis).
+    
+    NOTE: For loaded templates, the times and requested values are 
+          views of the (possibly memory-mapped) template data, as are
+          the voltages of voltage templates. Everything is processed a
+          chunk of points at a time.
+    """
+    
+    # Collect template values into arrays
+    time = np.asarray(template["time"], dtype=np.float64)
+    if "values" in template:
+        requests = np.asarray(template["values"], dtype=np.float64)
+    else:
+        requests = np.array([template["x_val"],
+                             template["y_val"],
+                             template["z_val"]], dtype=np.float64)
+    n_points = requests.shape[1]
+    
+    # Determine voltages for each point
+    if template["type"] == "field":
+        voltages = np.empty_like(requests)
+        for start in range(0, n_points, CHUNK_ROWS):
+            end = start + CHUNK_ROWS
+            voltages[:, start:end] = calibration.get_voltages_for_fields(
+                requests[:, start:end].T).T
     else:
-        print ("ERROR: The number of values on each axis is not all equal.")
-        is_okay = False
+        voltages = requests
+    
+    # Check voltages are valid and within limits
+    for start in range(0, n_points, CHUNK_ROWS):
+        chunk = voltages[:, start:start + CHUNK_ROWS]
+        if voltage_limits is None:
+            is_bad = ~np.isfinite(chunk)
+        else:
+            is_bad = find_bad_values(chunk, voltage_limits["min"],
+                                     voltage_limits["max"])
+        if is_bad.any():
+            i = start + int(np.argmax(is_bad.any(axis=0)))
+            print("ERROR: Template voltages {} are beyond limits".format(
+                voltages[:, i].tolist()))
+            print("Check: row {}".format(i))
+            return None
+    
+    # Store schedule arrays
+    schedule = {
+        "time": time,
+        "type": template["type"],
+        "requests": requests,
+        "voltages": voltages
+    }
     
-    return is_okay
+    return schedule
@@ -0,0 +1,9 @@
+#!/bin/bash -e
+#Copyright 2026 UC CubeCats
+#All rights reserved. See LICENSE file at:
+#https://github.com/uccubecats/Helmholtz-Cage/LICENSE
+#Additional copyright may be held by others, as reflected in the commit history.
+
+RELATIVE_PATH="`dirname \"$0\"`"
+ABSOLUTE_PATH="`( cd \"$RELATIVE_PATH\" && pwd )`"
+python3 $ABSOLUTE_PATH/helmholtz_cage/headless.py "$@"